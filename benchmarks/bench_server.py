@@ -0,0 +1,335 @@
+"""Load benchmark for the GlobalTags tag API
+
+Seeds a throwaway tags.db with synthetic tags, starts the server under uvicorn in a scratch
+directory and drives every endpoint with concurrent HTTP load. Results are printed as JSON and
+can be saved as a baseline that later runs are compared against.
+
+    python benchmarks/bench_server.py --sizes 1000 100000 --output results.json
+    python benchmarks/bench_server.py --sizes 1000 --compare results.json
+    python benchmarks/bench_server.py --sizes 1000 --database-url postgresql+psycopg://localhost/globaltags_bench
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+DATABASE_KEY = "benchmark-key"
+
+# Mirrors the schema SQLAlchemy creates for server.Tag
+SCHEMA = [
+    "CREATE TABLE tags (id INTEGER NOT NULL, name VARCHAR NOT NULL, message VARCHAR NOT NULL, "
+    "owner VARCHAR NOT NULL, owner_id VARCHAR NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_tags_name ON tags (name)",
+    "CREATE INDEX ix_tags_id ON tags (id)",
+]
+
+
+def synthetic_rows(size, owners=1000):
+    """`size` synthetic tags spread across `owners` owners"""
+    for i in range(size):
+        owner = i % owners
+        yield (f"tag{i}", f"Synthetic message number {i}", f"owner{owner}", str(100000 + owner))
+
+
+def seed_database(path, size):
+    """Create a scratch tags.db with `size` synthetic tags"""
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+    conn.executemany("INSERT INTO tags (name, message, owner, owner_id) VALUES (?, ?, ?, ?)", synthetic_rows(size))
+    conn.commit()
+    conn.close()
+
+
+def seed_external_database(url, size, batch_size=10000, drop_existing=False):
+    """Recreate the tags table in an external database (e.g. PostgreSQL) with `size` synthetic tags
+
+    Refuses to touch a tags table that already holds rows unless `drop_existing` is set, so pointing
+    --database-url at a real database can't wipe it.
+    """
+    from sqlalchemy import create_engine, inspect, func, select, MetaData, Table, Column, Integer, String
+
+    metadata = MetaData()
+    tags = Table(
+        "tags", metadata,
+        Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+        Column("name", String, unique=True, index=True, nullable=False),
+        Column("message", String, nullable=False),
+        Column("owner", String, nullable=False),
+        Column("owner_id", String, nullable=False),
+    )
+
+    engine = create_engine(url)
+    if not drop_existing and inspect(engine).has_table("tags"):
+        with engine.connect() as conn:
+            existing = conn.execute(select(func.count()).select_from(tags)).scalar()
+        if existing:
+            engine.dispose()
+            raise SystemExit(f"{engine.url} already has {existing} tags, pass --drop-existing to replace them")
+
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        batch = []
+        for name, message, owner, owner_id in synthetic_rows(size):
+            batch.append({"name": name, "message": message, "owner": owner, "owner_id": owner_id})
+            if len(batch) == batch_size:
+                conn.execute(tags.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(tags.insert(), batch)
+    engine.dispose()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir, port, database_url=None):
+    """Start uvicorn serving server:app from `workdir` and wait until it answers"""
+    config = json.load(open(os.path.join(REPO_ROOT, "config.json"), "r"))
+    config.update({"host": "127.0.0.1", "port": port, "ignore_localhost_requests": True})
+    json.dump(config, open(os.path.join(workdir, "config.json"), "w"), indent=4)
+    os.makedirs(os.path.join(workdir, "logs"), exist_ok=True)
+
+    env = {**os.environ, "DATABASE_KEY": DATABASE_KEY}
+    if database_url:
+        env["DATABASE_URL"] = database_url
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--app-dir", SRC_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+
+    process.kill()
+    raise RuntimeError("Server did not start in time")
+
+
+class RssSampler:
+    """Samples the server's resident set size in the background and keeps the peak"""
+
+    def __init__(self, pid, interval=0.05):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                self.peak = max(self.peak, self.process.memory_info().rss)
+            except psutil.Error:
+                return
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        return self.peak
+
+
+def run_scenario(base_url, make_request, count, concurrency):
+    """Fire `count` requests across `concurrency` threads, returning throughput and latencies"""
+    local = threading.local()
+
+    def task(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        ok = make_request(local.session, base_url, i)
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(task, range(count)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+    return {
+        "requests": count,
+        "errors": sum(1 for _, ok in results if not ok),
+        "throughput_rps": count / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies),
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "max": latencies[-1],
+        },
+    }
+
+
+def build_scenarios(size, run_id):
+    """Return (name, request function, share of the request budget) for every endpoint"""
+    rng = random.Random(size)
+
+    def get_tags(session, base_url, i):
+        return session.get(f"{base_url}/tags").status_code == 200
+
+    def get_tag(session, base_url, i):
+        # Half hits, half misses so negative lookups are measured too
+        name = f"tag{rng.randrange(size)}" if i % 2 == 0 else f"missing{i}"
+        return session.get(f"{base_url}/tags/{name}").status_code in (200, 404)
+
+    def create_tag(session, base_url, i):
+        body = {"name": f"bench{run_id}_{i}", "message": "benchmark", "owner": "bench",
+                "owner_id": "1", "key": DATABASE_KEY}
+        return session.post(f"{base_url}/tags", json=body).json().get("success") is True
+
+    def delete_tag(session, base_url, i):
+        response = session.delete(f"{base_url}/tags/bench{run_id}_{i}", json={"key": DATABASE_KEY})
+        return response.json().get("success") is True
+
+    def get_stats(session, base_url, i):
+        return session.get(f"{base_url}/stats").status_code == 200
+
+    # Full table dumps get expensive quickly, scale their share down with the table size
+    return [
+        ("get_tags", get_tags, min(1.0, 1000 / size) * 0.1),
+        ("get_tag", get_tag, 1.0),
+        ("create_tag", create_tag, 0.5),
+        ("delete_tag", delete_tag, 0.5),
+        ("stats", get_stats, 0.2),
+    ]
+
+
+def benchmark_size(size, requests_per_scenario, concurrency, database_url=None, drop_existing=False):
+    workdir = tempfile.mkdtemp(prefix="globaltags-bench-")
+    try:
+        seed_start = time.perf_counter()
+        if database_url:
+            seed_external_database(database_url, size, drop_existing=drop_existing)
+        else:
+            seed_database(os.path.join(workdir, "tags.db"), size)
+        seed_time = time.perf_counter() - seed_start
+
+        port = free_port()
+        startup_start = time.perf_counter()
+        process = start_server(workdir, port, database_url)
+        startup_time = time.perf_counter() - startup_start
+        sampler = RssSampler(process.pid)
+
+        base_url = f"http://127.0.0.1:{port}"
+        results = {"size": size, "seed_seconds": seed_time, "startup_seconds": startup_time, "endpoints": {}}
+        try:
+            for name, make_request, share in build_scenarios(size, port):
+                count = max(concurrency, int(requests_per_scenario * share))
+                # delete_tag removes exactly what create_tag inserted
+                if name == "delete_tag":
+                    count = results["endpoints"]["create_tag"]["requests"]
+                results["endpoints"][name] = run_scenario(base_url, make_request, count, concurrency)
+                print(f"  {size} tags, {name}: {results['endpoints'][name]['throughput_rps']:.0f} req/s",
+                      file=sys.stderr)
+        finally:
+            results["peak_rss_mb"] = sampler.stop() / (1024 * 1024)
+            process.terminate()
+            process.wait(timeout=30)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(current, baseline, threshold):
+    """List regressions where throughput dropped or p95 latency / peak RSS grew past `threshold`"""
+    regressions = []
+    baseline_by_size = {run["size"]: run for run in baseline["runs"]}
+
+    for run in current["runs"]:
+        base = baseline_by_size.get(run["size"])
+        if base is None:
+            continue
+
+        if run["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{run['size']} tags: peak RSS {base['peak_rss_mb']:.1f} -> {run['peak_rss_mb']:.1f} MB")
+
+        for name, result in run["endpoints"].items():
+            base_result = base["endpoints"].get(name)
+            if base_result is None:
+                continue
+            if result["throughput_rps"] < base_result["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{run['size']} tags, {name}: throughput "
+                                   f"{base_result['throughput_rps']:.0f} -> {result['throughput_rps']:.0f} req/s")
+            if result["latency_ms"]["p95"] > base_result["latency_ms"]["p95"] * (1 + threshold):
+                regressions.append(f"{run['size']} tags, {name}: p95 latency "
+                                   f"{base_result['latency_ms']['p95']:.2f} -> {result['latency_ms']['p95']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GlobalTags Server load benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="Table sizes to seed")
+    parser.add_argument("--requests", type=int, default=2000, help="Request budget per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--database-url", help="Benchmark against this database instead of a scratch SQLite file")
+    parser.add_argument("--drop-existing", action="store_true",
+                        help="Allow replacing a non-empty tags table in --database-url")
+    parser.add_argument("--output", help="Write results to this JSON file (e.g. to save a baseline)")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    runs = []
+    for i, size in enumerate(args.sizes):
+        # After the first size the table holds our own synthetic rows, which are always safe to replace
+        drop_existing = args.drop_existing or i > 0
+        runs.append(benchmark_size(size, args.requests, args.concurrency, args.database_url, drop_existing))
+
+    results = {
+        "python": sys.version.split()[0],
+        "concurrency": args.concurrency,
+        "backend": args.database_url.split(":", 1)[0] if args.database_url else "sqlite",
+        "runs": runs,
+    }
+
+    if args.compare:
+        baseline = json.load(open(args.compare, "r"))
+        results["regressions"] = compare(results, baseline, args.threshold)
+
+    output = json.dumps(results, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    if results.get("regressions"):
+        print(f"{len(results['regressions'])} regression(s) against {args.compare}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Memory footprint of the in-memory tag store
+
+Loads synthetic tags into tagStore.TagStore and reports the bytes held per tag, next to
+the same rows kept as ORM Tag instances plus TagResponseSchema copies for comparison.
+
+    python benchmarks/bench_tag_store.py --size 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from bench_server import synthetic_rows, SRC_DIR
+
+sys.path.insert(0, SRC_DIR)
+os.environ.setdefault("DATABASE_KEY", "benchmark-key")
+
+
+def measure(build):
+    """Return (result, bytes allocated by build, seconds taken)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def build_store(size):
+    from tagStore import TagStore
+    store = TagStore()
+    store.load(synthetic_rows(size))
+    return store
+
+
+def build_orm(size):
+    from server import Tag, TagResponseSchema
+    tags = [Tag(name=name, message=message, owner=owner, owner_id=owner_id)
+            for name, message, owner, owner_id in synthetic_rows(size)]
+    responses = [TagResponseSchema.model_validate(tag) for tag in tags]
+    return tags, responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory tag store footprint")
+    parser.add_argument("--size", type=int, default=1000000, help="Number of synthetic tags")
+    parser.add_argument("--skip-orm", action="store_true", help="Don't measure the ORM + Pydantic baseline")
+    args = parser.parse_args()
+
+    results = {"size": args.size}
+
+    store, store_bytes, store_seconds = measure(lambda: build_store(args.size))
+    results["tag_store"] = {
+        "bytes_per_tag": store_bytes / args.size,
+        "total_mb": store_bytes / (1024 * 1024),
+        "load_seconds": store_seconds,
+        "owners": len(store.owners),
+    }
+    del store
+
+    if not args.skip_orm:
+        import server  # Import cost shouldn't count against the ORM rows
+        rows, orm_bytes, orm_seconds = measure(lambda: build_orm(args.size))
+        results["orm_and_pydantic"] = {
+            "bytes_per_tag": orm_bytes / args.size,
+            "total_mb": orm_bytes / (1024 * 1024),
+            "load_seconds": orm_seconds,
+        }
+        del rows
+
+    print(json.dumps(results, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,24 @@
 import json
 
-# Config loading
-CONFIG = json.load(open("config.json", "r"))
+# Config loading, deferred until the first lookup
+CONFIG = None
+
+
+def load():
+    """Read config.json, replacing any previously loaded values"""
+    global CONFIG
+    with open("config.json", "r") as f:
+        CONFIG = json.load(f)
+    return CONFIG
 
 
 def get(key):
     """Get a value from the config file"""
+    if CONFIG is None:
+        load()
     return CONFIG.get(key, None)
+
+
+def get_section(key, defaults):
+    """Get a config section, with `defaults` filling in whatever config.json leaves out"""
+    return {**defaults, **(get(key) or {})}
@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QWidget, QGridLayout, QFrame
-from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtCore import Qt, Signal, QTimer, QThread
 import rites.logger as l
 
 from .styles import Styles, Colors
@@ -7,18 +7,15 @@ from .widgets.ImageButton import ImageButton
 
 from .widgets.ServerStatItem import ServerStatItem
 from .widgets.CustomTitleBar import CustomTitleBar
+from .widgets.LogViewer import LogViewer
+from .worker import StatsWorker
 
 from util import export_data_as_csv
 
-import cfg
-
 import threading
 import os
 import sys
 import time
-import psutil
-import subprocess
-import requests
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -30,6 +27,8 @@ class ServerManagerGUI(QMainWindow):
 
     # Define signals for thread-safe GUI updates
     status_changed = Signal(str)
+    server_pid_changed = Signal(int)
+    stop_stats = Signal()
 
     def __init__(self, run_server_func, stop_server_func=None):
         super().__init__(None, Qt.FramelessWindowHint)
@@ -37,7 +36,6 @@ class ServerManagerGUI(QMainWindow):
         self.stop_server_func = stop_server_func
         self.server_thread = None
         self.server_running = False
-        self.server_process = None
         self.statItems: list[ServerStatItem] = []
 
         self.setGeometry(100, 100, 600, 350)  # Smaller window size
@@ -46,10 +44,22 @@ class ServerManagerGUI(QMainWindow):
         # Connect signals
         # self.status_changed.connect(self.update_status)
 
-        # Setup timer for stats update
-        self.stats_timer = QTimer()
-        self.stats_timer.timeout.connect(self.update_stats)
-        self.stats_timer.start(1000)  # Update every second
+        # Collect stats in a worker thread so slow polls never block the UI
+        self.stats_thread = QThread(self)
+        self.stats_worker = StatsWorker()
+        self.stats_worker.moveToThread(self.stats_thread)
+        self.stats_thread.started.connect(self.stats_worker.start)
+        self.stats_worker.stats_ready.connect(self.update_stats)
+        self.server_pid_changed.connect(self.stats_worker.set_pid)
+        # Blocking so the worker's timer is stopped on its own thread before the thread quits
+        self.stop_stats.connect(self.stats_worker.stop, Qt.BlockingQueuedConnection)
+        self.stats_thread.finished.connect(self.stats_worker.deleteLater)
+        self.stats_thread.start()
+
+        # Uptime is cheap to compute, keep it ticking on the UI thread
+        self.uptime_timer = QTimer()
+        self.uptime_timer.timeout.connect(self.update_uptime)
+        self.uptime_timer.start(1000)
 
     def setup_ui(self):
         """Set up the user interface components"""
@@ -114,7 +124,7 @@ class ServerManagerGUI(QMainWindow):
 
         # Open Logs button
         self.logs_button = ImageButton("logs_button", parent=self, size=(32, 32))
-        self.logs_button.clicked.connect(open_logs)
+        self.logs_button.clicked.connect(self.toggle_logs)
         button_layout.addWidget(self.logs_button, 0, 0)
 
         # Power Button
@@ -128,6 +138,12 @@ class ServerManagerGUI(QMainWindow):
         button_layout.addWidget(self.csv_button, 0, 2)
 
         main_layout.addLayout(button_layout)
+
+        # Log panel, hidden until the logs button is pressed
+        self.log_viewer = LogViewer("logs/latest.log")
+        self.log_viewer.hide()
+        main_layout.addWidget(self.log_viewer)
+
         self.setCentralWidget(main_widget)
 
         # Start time tracking
@@ -156,7 +172,6 @@ class ServerManagerGUI(QMainWindow):
             self.stop_server()
         else:
             self.start_server()
-        self.update_stats()
 
     def _run_server_thread(self):
         """Run the server in a thread"""
@@ -164,8 +179,8 @@ class ServerManagerGUI(QMainWindow):
             self.status_changed.emit("Server Status: Online")
             LOGGER.info("Server is now online!")
 
-            # Get the current process
-            self.server_process = psutil.Process(os.getpid())
+            # Start collecting stats for the current process
+            self.server_pid_changed.emit(os.getpid())
 
             # Start the actual server
             self.run_server_func()
@@ -174,6 +189,7 @@ class ServerManagerGUI(QMainWindow):
             LOGGER.error(f"Server error: {str(e)}")
             self.server_running = False
             self.server_start_time = None
+            self.server_pid_changed.emit(0)
             self.power_button.setEnabled(True)
 
     def stop_server(self):
@@ -193,98 +209,67 @@ class ServerManagerGUI(QMainWindow):
 
         self.server_running = False
         self.server_start_time = None
+        self.server_pid_changed.emit(0)
+        self.reset_stats()
         self.status_changed.emit("Server Status: Offline")
         LOGGER.info("Server has been stopped")
         self.power_button.change_icon("off_button")
 
-    def update_stats(self):
-        """Update server statistics display"""
-        if not self.server_running or not self.server_process:
-            # Reset stats if server is not running
-
-            for stat_item in self.statItems:
-                stat_item.update_value("--")
-            return
+    def toggle_logs(self):
+        """Show or hide the live log panel, growing the window to fit it"""
+        if self.log_viewer.isVisible():
+            self.log_viewer.hide()
+            self.resize(self.width(), 350)
+        else:
+            self.log_viewer.show()
+            self.resize(self.width(), 700)
 
-        try:
-                        # Uptime
-            if self.server_start_time:
-                uptime_seconds = int(time.time() - self.server_start_time)
-                hours, remainder = divmod(uptime_seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                uptime_str = f"{hours:02}:{minutes:02}:{seconds:02}"
-                self.uptime_stat.update_value(uptime_str)
-
-            # CPU and Memory
-            cpu_percent = self.server_process.cpu_percent(interval=0.1)
-            self.cpu_stat.update_value(f"{cpu_percent:.1f}%")
-
-            memory_info = self.server_process.memory_info()
-            memory_mb = memory_info.rss / (1024 * 1024)
-            self.memory_stat.update_value(f"{memory_mb:.1f} MB")
+    def reset_stats(self):
+        """Reset every stat to its placeholder"""
+        for stat_item in self.statItems:
+            stat_item.update_value("--")
 
-            try:
-                response = requests.get(f"http://{cfg.get('host')}:{cfg.get('port')}/stats", timeout=2)
-                if response.status_code == 200:
-                    stats = response.json()
-                    self.requests_stat.update_value(str(stats["requests_handled"]))
-                    self.tags_stat.update_value(str(stats["tag_count"]))
-
-                    # Update endpoints count if available
-                    if "endpoints_count" in stats:
-                        self.endpoints_stat.update_value(str(stats["endpoints_count"]))
-                    else:
-                        self.endpoints_stat.update_value("5")  # Default value
-                else:
-                    LOGGER.warning(f"Failed to fetch stats: HTTP {response.status_code}")
-                    self.requests_stat.update_value("--")
-                    self.tags_stat.update_value("--")
-                    self.endpoints_stat.update_value("--")
-            except requests.exceptions.RequestException as e:
-                LOGGER.warning(f"Failed to connect to stats endpoint: {str(e)}")
-                self.requests_stat.update_value("--")
-                self.tags_stat.update_value("--")
-                self.endpoints_stat.update_value("--")
+    def update_uptime(self):
+        """Update the uptime display"""
+        if not self.server_running or not self.server_start_time:
+            return
 
-        except Exception as e:
-            LOGGER.warning(f"Failed to update stats: {str(e)}")
+        uptime_seconds = int(time.time() - self.server_start_time)
+        hours, remainder = divmod(uptime_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        self.uptime_stat.update_value(f"{hours:02}:{minutes:02}:{seconds:02}")
 
+    def update_stats(self, stats):
+        """Update server statistics display with a snapshot from the stats worker"""
+        if not self.server_running:
+            self.reset_stats()
+            return
 
-class LogHandler:
-    """Custom log handler that redirects logs to the GUI"""
+        if "cpu_percent" in stats:
+            self.cpu_stat.update_value(f"{stats['cpu_percent']:.1f}%")
+        if "memory_mb" in stats:
+            self.memory_stat.update_value(f"{stats['memory_mb']:.1f} MB")
 
-    def __init__(self, gui):
-        self.gui = gui
+        server_stats = stats.get("server")
+        if server_stats:
+            self.requests_stat.update_value(str(server_stats["requests_handled"]))
+            self.tags_stat.update_value(str(server_stats["tag_count"]))
+            self.endpoints_stat.update_value(str(server_stats.get("endpoints_count", "--")))
+        else:
+            self.requests_stat.update_value("--")
+            self.tags_stat.update_value("--")
+            self.endpoints_stat.update_value("--")
 
-    def emit(self, record):
-        """Emit a log record to the GUI"""
-        log_entry = self.format(record)
-        self.gui.append_log(log_entry)
+    def closeEvent(self, event):
+        """Stop the stats worker thread before the window goes away"""
+        if self.stats_thread.isRunning():
+            self.stop_stats.emit()
+        self.stats_thread.quit()
+        self.stats_thread.wait(2000)
+        super().closeEvent(event)
 
 
 # ----- Standalone Functions ----- #
-def open_logs(self):
-    """Open the logs/latest.log file with the default system application"""
-    log_path = os.path.abspath("logs/latest.log")
-
-    if not os.path.exists(log_path):
-        LOGGER.warning(f"Log file not found: {log_path}")
-        return
-
-    try:
-        # Open with default application based on operating system
-        if sys.platform.startswith('darwin'):  # macOS
-            subprocess.call(('open', log_path))
-        elif os.name == 'nt':  # Windows
-            os.startfile(log_path)
-        elif os.name == 'posix':  # Linux
-            subprocess.call(('xdg-open', log_path))
-
-        LOGGER.debug(f"Opened log file: {log_path}")
-    except Exception as e:
-        LOGGER.error(f"Failed to open log file: {str(e)}")
-
-
 def create_horizontal_line():
     line = QFrame()
     line.setFrameShape(QFrame.HLine)
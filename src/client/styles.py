@@ -77,4 +77,18 @@ class Styles:
         font-size: 18px;
         font-weight: bold;
         color: #f0ad4e;
-    """
\ No newline at end of file
+    """
+
+    LOG_VIEWER = f"""
+        color: {Colors.THIRD};
+        background-color: rgba({Colors.BACKGROUND_RGB}, 0.8);
+        border: 1px solid {Colors.SECONDARY};
+        border-radius: 5px;
+    """
+
+    LOG_FILTER = f"""
+        color: {Colors.THIRD};
+        background-color: {Colors.BACKGROUND};
+        border: 1px solid {Colors.SECONDARY};
+        padding: 2px 6px;
+    """
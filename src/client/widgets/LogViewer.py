@@ -0,0 +1,175 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QComboBox, QLabel
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QFont
+
+from ..styles import Styles
+
+import codecs
+import collections
+import os
+import re
+
+# rites writes colored entries back to back, so entries are split on their timestamp instead of on newlines
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+PARTIAL_ESCAPE = re.compile(r"\x1b(\[[0-9;]*)?$")
+ENTRY_START = re.compile(r"(?=\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\] \[)")
+ENTRY_LEVEL = re.compile(r"^\[[^\]]*\] \[[^\]]*\] \[([A-Z]{3})\]")
+
+LEVELS = ["All", "INF", "SCS", "WRN", "ERR", "CRR", "DBG", "ACC", "UVI", "UVE", "API"]
+
+
+class LogTailer:
+    """Incrementally reads entries appended to a log file, only ever touching new bytes"""
+
+    def __init__(self, path, initial_bytes=256 * 1024, max_read=1024 * 1024):
+        self.path = path
+        self.initial_bytes = initial_bytes
+        self.max_read = max_read
+        self.offset = None
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.pending = ""
+        self.partial_escape = ""
+        self.discard_leading = False
+
+    def read(self):
+        """Return the entries appended since the last call"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+
+        entries = []
+        if self.offset is None:
+            # Start near the end, a large log would take far too long to load whole
+            self.offset = max(0, size - self.initial_bytes)
+            self.discard_leading = self.offset > 0
+        elif size < self.offset:
+            # The file was truncated or rotated
+            self.reset()
+            self.offset = 0
+        elif size - self.offset > self.max_read * 4:
+            # Fell too far behind, jump to the tail rather than replaying the backlog
+            skipped = size - self.max_read - self.offset
+            entries.append(f"... skipped {skipped / (1024 * 1024):.1f} MB of log output ...")
+            self.reset()
+            self.offset = size - self.max_read
+            self.discard_leading = True
+
+        if size == self.offset:
+            # Nothing new, so whatever is pending is a complete entry
+            return entries + self._flush_pending()
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(size - self.offset, self.max_read))
+        self.offset += len(data)
+
+        text = self.partial_escape + self.decoder.decode(data)
+        match = PARTIAL_ESCAPE.search(text)
+        if match:
+            self.partial_escape = text[match.start():]
+            text = text[:match.start()]
+        else:
+            self.partial_escape = ""
+
+        parts = ENTRY_START.split(self.pending + ANSI_ESCAPE.sub("", text))
+        if self.discard_leading:
+            # We started reading mid-entry, drop everything before the first full entry
+            if len(parts) == 1:
+                self.pending = ""
+                return entries
+            parts.pop(0)
+            self.discard_leading = False
+        # The last entry may still be mid-write, hold it back until more data or a quiet tick
+        self.pending = parts.pop()
+        entries.extend(part.strip() for part in parts if part.strip())
+        return entries
+
+    def _flush_pending(self):
+        entry = self.pending.strip()
+        self.pending = ""
+        return [entry] if entry else []
+
+    def reset(self):
+        self.decoder.reset()
+        self.pending = ""
+        self.partial_escape = ""
+
+
+class LogViewer(QWidget):
+    """Live view of a log file with level filtering, bounded to the most recent entries"""
+
+    def __init__(self, path="logs/latest.log", max_entries=5000, refresh_interval=500, parent=None):
+        super().__init__(parent)
+        self.tailer = LogTailer(path)
+        self.entries = collections.deque(maxlen=max_entries)
+
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+        # Level filter
+        filter_layout = QHBoxLayout()
+        filter_label = QLabel("Level")
+        filter_label.setStyleSheet(Styles.STATS_LABEL)
+        self.level_filter = QComboBox()
+        self.level_filter.addItems(LEVELS)
+        self.level_filter.setStyleSheet(Styles.LOG_FILTER)
+        self.level_filter.currentTextChanged.connect(self.refilter)
+        filter_layout.addWidget(filter_label)
+        filter_layout.addWidget(self.level_filter)
+        filter_layout.addStretch(1)
+        self.layout.addLayout(filter_layout)
+
+        # Entries, the block limit keeps the document from growing with the log
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(max_entries)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setFont(QFont("monospace", 9))
+        self.text.setStyleSheet(Styles.LOG_VIEWER)
+        self.layout.addWidget(self.text)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.refresh_interval = refresh_interval
+
+    def showEvent(self, event):
+        self.poll()
+        self.timer.start(self.refresh_interval)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def poll(self):
+        """Append newly written entries that match the current filter"""
+        new_entries = self.tailer.read()
+        if not new_entries:
+            return
+
+        self.entries.extend(new_entries)
+        visible = [entry for entry in new_entries if self.matches(entry)]
+        if visible:
+            self.append(visible)
+
+    def matches(self, entry):
+        level = self.level_filter.currentText()
+        if level == "All":
+            return True
+        match = ENTRY_LEVEL.match(entry)
+        return match is not None and match.group(1) == level
+
+    def refilter(self):
+        """Re-render the retained entries under the new filter"""
+        self.text.clear()
+        self.append([entry for entry in self.entries if self.matches(entry)])
+
+    def append(self, entries):
+        if not entries:
+            return
+        scrollbar = self.text.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.text.appendPlainText("\n".join(entries))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
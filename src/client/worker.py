@@ -0,0 +1,95 @@
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+import rites.logger as l
+
+import cfg
+import httpClient
+from metrics import METRICS
+
+import psutil
+import requests
+
+LOGGER = l.get_sec_logger("logs", log_name="GUI")
+
+DEFAULT_SETTINGS = {
+    "refresh_interval": 1000,
+    "max_backoff": 30000,
+}
+
+
+class StatsWorker(QObject):
+    """Collects process and server stats off the UI thread and reports them through signals"""
+
+    stats_ready = Signal(dict)
+
+    def __init__(self, settings=None):
+        super().__init__()
+        if settings is None:
+            settings = cfg.get_section("gui", DEFAULT_SETTINGS)
+        self.refresh_interval = int(settings["refresh_interval"])
+        self.max_backoff = int(settings["max_backoff"])
+
+        self.process = None
+        self.failures = 0
+        self.next_server_poll = 0
+        self.timer = None
+
+    @Slot()
+    def start(self):
+        """Start polling; must run in the worker thread so the timer lives there"""
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(self.refresh_interval)
+
+    @Slot()
+    def stop(self):
+        if self.timer:
+            self.timer.stop()
+
+    @Slot(int)
+    def set_pid(self, pid):
+        """Track the given process, or stop collecting when pid is 0"""
+        if pid:
+            self.process = psutil.Process(pid)
+            # First call only primes the counter, later calls measure since the previous one
+            self.process.cpu_percent(interval=None)
+        else:
+            self.process = None
+        self.failures = 0
+        self.next_server_poll = 0
+
+    @Slot()
+    def poll(self):
+        if self.process is None:
+            return
+
+        stats = {}
+        try:
+            stats["cpu_percent"] = self.process.cpu_percent(interval=None)
+            stats["memory_mb"] = self.process.memory_info().rss / (1024 * 1024)
+        except psutil.Error as e:
+            LOGGER.warning(f"Failed to read process stats: {str(e)}")
+
+        stats["server"] = self.fetch_server_stats()
+        self.stats_ready.emit(stats)
+
+    def fetch_server_stats(self):
+        """Read the hosted server's metrics from memory, or ask over HTTP if it isn't in this process"""
+        if METRICS.live:
+            return METRICS.snapshot()
+
+        self.next_server_poll -= self.refresh_interval
+        if self.next_server_poll > 0:
+            return None
+
+        try:
+            response = httpClient.get(f"{httpClient.get_base_url()}/stats")
+            if response.status_code == 200:
+                self.failures = 0
+                return response.json()
+            LOGGER.warning(f"Failed to fetch stats: HTTP {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            LOGGER.warning(f"Failed to connect to stats endpoint: {str(e)}")
+
+        self.failures += 1
+        self.next_server_poll = min(self.refresh_interval * 2 ** self.failures, self.max_backoff)
+        return None
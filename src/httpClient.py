@@ -0,0 +1,78 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachecontrol import CacheControl
+
+import cfg
+
+DEFAULT_SETTINGS = {
+    "timeout": 2.0,
+    "retries": 2,
+    "backoff_factor": 0.2,
+    "pool_size": 4,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_settings():
+    return cfg.get_section("http_client", DEFAULT_SETTINGS)
+
+
+def create_session(settings=None):
+    """Create a keep-alive session with retries, backoff and conditional GET caching"""
+    if settings is None:
+        settings = get_settings()
+
+    retry = Retry(
+        total=int(settings["retries"]),
+        backoff_factor=float(settings["backoff_factor"]),
+        status_forcelist=(502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=int(settings["pool_size"]),
+        pool_maxsize=int(settings["pool_size"]),
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # GET /tags carries an ETag, so an unchanged tag list comes back as a bodyless 304 and is served from the cache
+    return CacheControl(session)
+
+
+def get_session():
+    """Shared session, created on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get_base_url():
+    return f"http://{cfg.get('host')}:{cfg.get('port')}"
+
+
+def get(url, timeout=None, **kwargs):
+    """GET through the shared session with the configured default timeout"""
+    if timeout is None:
+        timeout = float(get_settings()["timeout"])
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def close():
+    """Close the shared session and its pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,335 @@
+import abc
+import json
+import socket
+import threading
+import uuid
+
+from rites.logger import get_sec_logger
+
+import cfg
+
+LOGGER = get_sec_logger("logs", log_name="InvalidationBus")
+
+DEFAULT_SETTINGS = {
+    "backend": "none",
+    "channel": "globaltags_tags",
+    "redis_url": "redis://localhost:6379/0",
+    "udp_bind": "127.0.0.1:9850",
+    "udp_peers": [],
+}
+
+CREATE = "create"
+DELETE = "delete"
+
+# Seconds a listener blocks before checking whether it should stop
+LISTEN_TIMEOUT = 1
+# Seconds before the first reconnect attempt, doubled after every failure up to the maximum
+RECONNECT_DELAY = 1
+RECONNECT_MAX_DELAY = 30
+
+
+class InvalidationBus(abc.ABC):
+    """Broadcasts tag changes to every other server node so they can patch their read caches
+
+    Each message carries the sender's node id and tag version. Nodes drop their own echoes and
+    keep their version at the highest one seen, so /stats shows how far behind a node is.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.node_id = uuid.uuid4().hex
+        self.version = 0
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Call `callback(op, name)` for every change made by another node"""
+        self.subscribers.append(callback)
+
+    def publish(self, op, name):
+        with self.lock:
+            self.version += 1
+            version = self.version
+        message = json.dumps({"node": self.node_id, "version": version, "op": op, "name": name})
+        try:
+            self._send(message)
+        except Exception as e:
+            LOGGER.error(f"Failed to publish {op} of {name}: {e}")
+
+    def _deliver(self, raw):
+        try:
+            message = json.loads(raw)
+            if message["node"] == self.node_id:
+                return
+            with self.lock:
+                self.version = max(self.version, message["version"])
+            for callback in self.subscribers:
+                callback(message["op"], message["name"])
+        except Exception as e:
+            LOGGER.error(f"Failed to handle invalidation message {raw!r}: {e}")
+
+    @abc.abstractmethod
+    def _send(self, message):
+        """Hand the encoded `message` to every other node"""
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_stats(self):
+        return {"backend": type(self).__name__, "node_id": self.node_id, "version": self.version}
+
+
+class MemoryBus(InvalidationBus):
+    """In-process bus connecting every MemoryBus on the same channel, for tests and local setups"""
+    channels: dict[str, list["MemoryBus"]] = {}
+
+    def start(self):
+        MemoryBus.channels.setdefault(self.channel, []).append(self)
+
+    def stop(self):
+        buses = MemoryBus.channels.get(self.channel, [])
+        if self in buses:
+            buses.remove(self)
+
+    def _send(self, message):
+        for bus in list(MemoryBus.channels.get(self.channel, [])):
+            if bus is not self:
+                bus._deliver(message)
+
+
+class UdpBus(InvalidationBus):
+    """Sends every change as a datagram to a fixed list of peers, no broker needed
+
+    Datagrams are only accepted from the configured peers' addresses. Peers send from their bound
+    socket, so the source address of a genuine message is exactly one of the peer entries.
+    """
+
+    def __init__(self, channel, bind, peers):
+        super().__init__(channel)
+        self.bind = parse_address(bind)
+        self.peers = [parse_address(peer) for peer in peers]
+        self.peer_addresses = set()
+        self.rejected = 0
+        self.sock = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        self.peer_addresses = {(socket.gethostbyname(host), port) for host, port in self.peers}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.bind)
+        # Neither close nor shutdown wakes a thread blocked in recvfrom, so it also polls the stop flag
+        self.sock.settimeout(LISTEN_TIMEOUT)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._listen, name="UdpInvalidationBus", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            # Wake the listener with an empty datagram rather than waiting out its timeout
+            try:
+                self.sock.sendto(b"", self.sock.getsockname())
+            except OSError:
+                pass
+            self.thread.join()
+            self.thread = None
+        # Only close once the listener is gone, so the port is free for a restart when stop returns
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def _listen(self):
+        while not self.stop_event.is_set():
+            try:
+                data, sender = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                LOGGER.error(f"UDP listener stopped: {e}")
+                return
+            if self.stop_event.is_set():
+                return
+
+            if sender not in self.peer_addresses:
+                self.rejected += 1
+                LOGGER.warning(f"Dropped invalidation datagram from unknown sender {sender[0]}:{sender[1]}")
+                continue
+            try:
+                payload = json.loads(data)
+                if payload.get("channel") == self.channel:
+                    self._deliver(payload["message"])
+            except Exception as e:
+                LOGGER.error(f"Dropped malformed invalidation datagram from {sender[0]}:{sender[1]}: {e}")
+
+    def _send(self, message):
+        data = json.dumps({"channel": self.channel, "message": message}).encode("utf-8")
+        for peer in self.peers:
+            self.sock.sendto(data, peer)
+
+    def get_stats(self):
+        return {**super().get_stats(), "rejected": self.rejected}
+
+
+class BrokerBus(InvalidationBus):
+    """Bus that listens over a connection to a broker, reconnecting with exponential backoff when it drops
+
+    Messages sent while the listener is reconnecting are lost, so /stats reports the listener state
+    and how often it had to reconnect.
+    """
+
+    def __init__(self, channel):
+        super().__init__(channel)
+        self.connected = False
+        self.reconnects = 0
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @abc.abstractmethod
+    def _connect(self):
+        """(Re)open the listening connection and subscribe to the channel"""
+
+    @abc.abstractmethod
+    def _receive(self):
+        """Deliver the messages that arrive within about LISTEN_TIMEOUT, raise when the connection is lost"""
+
+    def _close(self):
+        """Close every connection, the listener thread has already stopped"""
+
+    def start(self):
+        # Connect up front, so a broker that is down at startup fails loudly instead of retrying forever
+        self._connect()
+        self.connected = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._listen, name=f"{type(self).__name__}Listener", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.connected = False
+        self._close()
+
+    def _listen(self):
+        delay = RECONNECT_DELAY
+        while not self.stop_event.is_set():
+            try:
+                if not self.connected:
+                    self._connect()
+                    self.connected = True
+                    self.reconnects += 1
+                    delay = RECONNECT_DELAY
+                    LOGGER.info(f"{type(self).__name__} listener reconnected")
+                self._receive()
+            except Exception as e:
+                if self.stop_event.is_set():
+                    return
+                if self.connected:
+                    LOGGER.error(f"{type(self).__name__} listener lost its connection: {e}")
+                else:
+                    LOGGER.error(f"{type(self).__name__} listener failed to reconnect, retrying in {delay}s: {e}")
+                self.connected = False
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def get_stats(self):
+        if self.thread is None:
+            listener = "stopped"
+        else:
+            listener = "connected" if self.connected else "reconnecting"
+        return {**super().get_stats(), "listener": listener, "reconnects": self.reconnects}
+
+
+class RedisBus(BrokerBus):
+    """Redis pub/sub, needs the redis package"""
+
+    def __init__(self, channel, url):
+        super().__init__(channel)
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.pubsub = None
+
+    def _connect(self):
+        if self.pubsub:
+            self.pubsub.close()
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(**{self.channel: lambda message: self._deliver(message["data"])})
+
+    def _receive(self):
+        # Messages go to the subscribe handler, get_message only returns the ones without one
+        self.pubsub.get_message(timeout=LISTEN_TIMEOUT)
+
+    def _close(self):
+        if self.pubsub:
+            self.pubsub.close()
+            self.pubsub = None
+
+    def _send(self, message):
+        self.client.publish(self.channel, message)
+
+
+class PostgresBus(BrokerBus):
+    """PostgreSQL LISTEN/NOTIFY on the tag database itself, needs psycopg"""
+
+    def __init__(self, channel, url):
+        super().__init__(channel)
+        import psycopg
+        # psycopg wants a plain libpq URL, not SQLAlchemy's dialect+driver form
+        self.url = "postgresql://" + url.split("://", 1)[1]
+        self.psycopg = psycopg
+        self.listen_conn = None
+        self.notify_conn = None
+
+    def _connect(self):
+        if self.listen_conn:
+            self.listen_conn.close()
+        self.listen_conn = self.psycopg.connect(self.url, autocommit=True)
+        self.listen_conn.execute(f"LISTEN {self.channel}")
+
+    def _receive(self):
+        for notify in self.listen_conn.notifies(timeout=LISTEN_TIMEOUT):
+            self._deliver(notify.payload)
+
+    def _close(self):
+        for conn in (self.listen_conn, self.notify_conn):
+            if conn:
+                conn.close()
+        self.listen_conn = self.notify_conn = None
+
+    def _send(self, message):
+        with self.lock:
+            # Reopen a connection the server dropped, publish logs the error if that fails too
+            if self.notify_conn is None or self.notify_conn.closed:
+                self.notify_conn = self.psycopg.connect(self.url, autocommit=True)
+            self.notify_conn.execute("SELECT pg_notify(%s, %s)", (self.channel, message))
+
+
+def parse_address(address):
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def create_bus(settings=None):
+    """Build the configured bus, or None when running as a single node"""
+    if settings is None:
+        settings = cfg.get_section("invalidation_bus", DEFAULT_SETTINGS)
+
+    backend = settings["backend"]
+    channel = settings["channel"]
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryBus(channel)
+    if backend == "udp":
+        return UdpBus(channel, settings["udp_bind"], settings["udp_peers"])
+    if backend == "redis":
+        return RedisBus(channel, settings["redis_url"])
+    if backend == "postgres":
+        from database import get_database_url
+        return PostgresBus(channel, settings.get("postgres_url") or get_database_url())
+    raise ValueError(f"Unknown invalidation bus backend: {backend}")
@@ -1,6 +1,8 @@
 from logging import Handler
 from rites.logger import get_sec_logger
 
+from queryTiming import current_request_stats
+
 import cfg
 
 import sys
@@ -41,16 +43,21 @@ class RitesAccessHandler(Handler):
             if hasattr(record, 'args') and record.args:
                 # These are the elements of an access log
                 try:
-                    client_addr, request_line, status_code = record.args[:3]
+                    client_addr, method, path, http_version, status_code = record.args[:5]
                     if isinstance(client_addr, str):
                         if client_addr[0:2] == "::" and (cfg.get("ignore_localhost_requests") is True):
                             return
-                    msg = f"{client_addr} - \"{request_line}\" {status_code}"
+                    msg = f"{client_addr} - \"{method} {path} HTTP/{http_version}\" {status_code}"
                 except:
                     msg = record.getMessage()
             else:
                 msg = record.getMessage()
 
+            # Access logs are emitted in the request's context, so its DB stats are still reachable
+            db_stats = current_request_stats()
+            if db_stats is not None:
+                msg += f" [db: {db_stats.query_count} queries, {db_stats.db_time * 1000:.1f} ms]"
+
             uvilogger.custom("uvicorn.access", msg)
         except Exception as e:
             print(f"Error in access log handler: {e}")
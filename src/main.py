@@ -1,25 +1,41 @@
+from startupTimer import STARTUP_TIMER
+
 import uvicorn
 import signal
 import rites.logger as l
 import argparse
 import loggingHandler
-import src.cfg as cfg
+import cfg
 import atexit
+import threading
 
-from util import export_data_as_csv
+from util import export_data_as_csv, get_export_path, remove_file
 
 
 # Rites Setup
 LOGGER = l.get_logger("logs", log_name="FastAPI")
 LOGGER.add_custom("critical_error", "CRR", 255, 40, 40)
+STARTUP_TIMER.mark("core imports")
+
+DEFAULT_SHUTDOWN_SETTINGS = {
+    "drain_timeout": 10,
+    "exit_work_budget": 5,
+}
+
 
-# Import GUI app controller
-try:
-    from client.client import create_app, is_gui_available
-    GUI_AVAILABLE = is_gui_available()
-except ImportError as e:
-    LOGGER.custom("critical_error", "GUI not available, resorting to headless mode. See error below\n", e)
-    GUI_AVAILABLE = False
+def get_shutdown_settings():
+    return cfg.get_section("shutdown", DEFAULT_SHUTDOWN_SETTINGS)
+
+
+def load_gui():
+    """Import the GUI app controller, which pulls in Qt and psutil, only when the GUI is wanted"""
+    try:
+        from client.client import create_app, is_gui_available
+        if is_gui_available():
+            return create_app
+    except ImportError as e:
+        LOGGER.custom("critical_error", "GUI not available, resorting to headless mode. See error below\n", e)
+    return None
 
 
 def run_server():
@@ -33,9 +49,12 @@ def run_server():
         host=f"{cfg.get('host')}",
         port=int(cfg.get('port')),
         log_level="info",
-        log_config=loggingHandler.get_logging_config()
+        log_config=loggingHandler.get_logging_config(),
+        # Once stopped, in-flight requests get this long to finish before connections are cut
+        timeout_graceful_shutdown=int(get_shutdown_settings()["drain_timeout"])
     )
     server = uvicorn.Server(config)
+    STARTUP_TIMER.mark("config loaded")
     server.run()
 
 
@@ -43,30 +62,56 @@ def stop_server():
     """Function to stop the server gracefully"""
     global server
     if server:
-        LOGGER.info("Stopping FastAPI server...")
-        # Send SIGINT to the server
+        LOGGER.info("Stopping FastAPI server, draining in-flight requests...")
+        # Send SIGINT to the server, uvicorn stops accepting and drains up to timeout_graceful_shutdown
         server.handle_exit(signal.SIGINT, None)
         server = None
     else:
         LOGGER.warning("No server running to stop")
 
 
+def run_exit_work():
+    """Run the exit-time CSV export within a time budget so shutdown takes a predictable time"""
+    budget = float(get_shutdown_settings()["exit_work_budget"])
+    cancel = threading.Event()
+    worker = threading.Thread(target=export_data_as_csv, kwargs={"suffix": "auto_export", "cancel": cancel}, daemon=True)
+    worker.start()
+    worker.join(budget)
+    if worker.is_alive():
+        LOGGER.warning(f"Auto-export did not finish within {budget:.0f}s, keeping the previous export")
+        # Give the export a moment to clean up after itself, a stuck query leaves it to us
+        cancel.set()
+        worker.join(1)
+        if worker.is_alive():
+            remove_file(get_export_path("auto_export") + ".tmp")
+
+
+def handle_sigterm(signum, frame):
+    """uvicorn re-raises SIGTERM once it has drained; exit normally so the atexit work still runs"""
+    raise SystemExit(128 + signum)
+
+
 # Main
 def main():
-    atexit.register(export_data_as_csv, suffix="auto_export")
+    atexit.register(run_exit_work)
+    signal.signal(signal.SIGTERM, handle_sigterm)
 
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="GlobalTags Server")
     parser.add_argument("--headless", action="store_true", help="Run in headless mode (CLI only)")
     args = parser.parse_args()
 
-    # Check if we should run in headless mode
-    if args.headless or not GUI_AVAILABLE:
-        if args.headless:
-            LOGGER.info("Starting in headless mode (--headless flag provided)...")
-        elif not GUI_AVAILABLE:
-            LOGGER.info("Starting in headless mode (GUI not available)...")
-            LOGGER.info("Install PySide6 and psutil for GUI mode: pip install PySide6 psutil")
+    # Headless mode never touches the GUI stack
+    if args.headless:
+        LOGGER.info("Starting in headless mode (--headless flag provided)...")
+        run_server()
+        return
+
+    create_app = load_gui()
+    STARTUP_TIMER.mark("gui imports")
+    if create_app is None:
+        LOGGER.info("Starting in headless mode (GUI not available)...")
+        LOGGER.info("Install PySide6 and psutil for GUI mode: pip install PySide6 psutil")
         run_server()
     else:
         # Start the GUI
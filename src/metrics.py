@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+class ServerMetrics:
+    """In-process server counters, readable without going through the HTTP API
+
+    Counters are bumped from the threadpool, the write queue and the invalidation bus at once,
+    and `x += 1` is a separate load, add and store, so writes go through a lock. Reads of a single
+    int are atomic, so readers like the GUI take a snapshot without locking.
+    """
+    __slots__ = ("live", "started_at", "requests_handled", "tag_count", "endpoints_count", "lock")
+
+    def __init__(self):
+        self.live = False
+        self.started_at = None
+        self.requests_handled = 0
+        self.tag_count = 0
+        self.endpoints_count = 0
+        self.lock = threading.Lock()
+
+    def count_request(self):
+        with self.lock:
+            self.requests_handled += 1
+
+    def adjust_tag_count(self, delta):
+        with self.lock:
+            self.tag_count += delta
+
+    def start(self, tag_count, endpoints_count):
+        with self.lock:
+            self.tag_count = tag_count
+        self.endpoints_count = endpoints_count
+        self.started_at = time.time()
+        self.live = True
+
+    def snapshot(self):
+        return {
+            "tag_count": self.tag_count,
+            "requests_handled": self.requests_handled,
+            "endpoints_count": self.endpoints_count,
+        }
+
+
+METRICS = ServerMetrics()
@@ -0,0 +1,62 @@
+import collections
+import os
+import sys
+import threading
+
+MAX_DURATION = 60
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 0.1
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for every thread in the running process
+
+    A daemon thread walks sys._current_frames() at a fixed interval and counts identical stacks,
+    so the cost is bounded by the sample rate rather than by how busy the server is.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = collections.Counter()
+        self.sample_count = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        # Wakes the sampler out of its wait, so this only blocks for the sample in progress
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.samples[(names.get(thread_id, str(thread_id)),) + _walk(frame)] += 1
+            self.sample_count += 1
+            self.stopped.wait(self.interval)
+
+    def collapsed(self):
+        """Samples in the collapsed stack format read by flamegraph.pl and speedscope"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+def _walk(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+# Only one profile may run at a time, overlapping samplers would just double the overhead
+PROFILE_LOCK = threading.Lock()
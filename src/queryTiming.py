@@ -0,0 +1,100 @@
+import os
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from rites.logger import get_sec_logger
+
+import cfg
+
+SLOW_QUERY_LOG_DIR = "logs/slow_queries"
+os.makedirs(SLOW_QUERY_LOG_DIR, exist_ok=True)
+SLOW_LOGGER = get_sec_logger(SLOW_QUERY_LOG_DIR, log_name="SlowQuery")
+
+DEFAULT_SETTINGS = {
+    "slow_query_threshold_ms": 100,
+    "explain_slow_queries": True,
+}
+
+_request_stats: ContextVar["RequestDbStats | None"] = ContextVar("request_db_stats", default=None)
+
+
+class RequestDbStats:
+    """Statement count and total database time for a single request"""
+    __slots__ = ("query_count", "db_time")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+
+
+def current_request_stats():
+    """Stats of the request being handled in the current context, if any"""
+    return _request_stats.get()
+
+
+class DbTimingMiddleware:
+    """ASGI middleware giving every request its own RequestDbStats
+
+    The stats object is shared by reference with the threadpool that runs sync endpoints,
+    so statements executed there are counted against the request that issued them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_stats.set(RequestDbStats())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_stats.reset(token)
+
+
+def instrument_engine(engine, settings=None):
+    """Time every statement run through `engine` and log the slow ones"""
+    if settings is None:
+        settings = cfg.get_section("db_timing", DEFAULT_SETTINGS)
+    threshold = float(settings["slow_query_threshold_ms"]) / 1000
+    explain = settings["explain_slow_queries"]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.query_count += 1
+            stats.db_time += elapsed
+
+        if elapsed >= threshold:
+            plan = explain_query(conn, cursor, statement, parameters, executemany) if explain else None
+            message = f"{elapsed * 1000:.1f} ms: {statement} | params: {parameters!r}"
+            if plan:
+                message += f"\n{plan}"
+            SLOW_LOGGER.warning(message)
+
+
+def explain_query(conn, cursor, statement, parameters, executemany):
+    """Return the query plan for `statement`, using the raw DBAPI connection so it isn't timed itself"""
+    if executemany or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT")):
+        return None
+
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            return "\n".join("    " + " ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return f"    (query plan unavailable: {e})"
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+import time
+
+from starlette.routing import Match
+from rites.logger import get_sec_logger
+
+import cfg
+
+LOGGER = get_sec_logger("logs", log_name="RateLimiter")
+
+LOCALHOST_ADDRESSES = ("127.0.0.1", "::1", "::ffff:127.0.0.1", "localhost")
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "default": {"rate": 10, "burst": 20},
+    "routes": {
+        "GET /tags": {"rate": 1, "burst": 5},
+        "GET /tags/{name}": {"rate": 20, "burst": 40},
+        "POST /tags": {"rate": 2, "burst": 5},
+        "DELETE /tags/{name}": {"rate": 2, "burst": 5},
+    },
+    "max_concurrent_requests": 32,
+    "queue_timeout": 5.0,
+    "bucket_ttl": 600,
+}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second, capped at `burst`"""
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def consume(self, now):
+        """Take a token if one is available, otherwise return the seconds until one is"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """In-memory per-client, per-route token buckets"""
+
+    def __init__(self, limits):
+        self.default = limits["default"]
+        self.routes = limits["routes"]
+        self.bucket_ttl = float(limits["bucket_ttl"])
+        self.buckets: dict[tuple[str, str], TokenBucket] = {}
+        self.lock = threading.Lock()
+        self.last_prune = time.monotonic()
+
+    def check(self, client, route):
+        """Return 0 if the request is admitted, otherwise the seconds to wait before retrying"""
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_prune > self.bucket_ttl:
+                self._prune(now)
+
+            bucket = self.buckets.get((client, route))
+            if bucket is None:
+                budget = self.routes.get(route, self.default)
+                bucket = TokenBucket(budget["rate"], budget["burst"])
+                self.buckets[(client, route)] = bucket
+            return bucket.consume(now)
+
+    def _prune(self, now):
+        """Drop buckets that haven't been touched in a while so idle clients don't pile up"""
+        stale = [key for key, bucket in self.buckets.items() if now - bucket.updated > self.bucket_ttl]
+        for key in stale:
+            del self.buckets[key]
+        self.last_prune = now
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-client rate limits and a global concurrency cap"""
+
+    def __init__(self, app, limits=None):
+        self.app = app
+        if limits is None:
+            limits = cfg.get_section("rate_limit", DEFAULT_SETTINGS)
+        self.enabled = limits["enabled"]
+        self.limiter = RateLimiter(limits)
+        self.max_concurrent = int(limits["max_concurrent_requests"])
+        self.queue_timeout = float(limits["queue_timeout"])
+        self.semaphore = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        if is_exempt(client):
+            await self.app(scope, receive, send)
+            return
+
+        route = resolve_route(scope)
+        retry_after = self.limiter.check(client, route)
+        if retry_after > 0:
+            LOGGER.warning(f"Rate limit exceeded for {client} on {route}")
+            await send_error(send, 429, "Too many requests", retry_after)
+            return
+
+        # The semaphore has to be created inside the running event loop
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            LOGGER.warning(f"Request from {client} on {route} timed out waiting for a free slot")
+            await send_error(send, 503, "Server busy, try again later", self.queue_timeout)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.semaphore.release()
+
+
+def is_exempt(client):
+    """Local tooling is exempt when ignore_localhost_requests is enabled"""
+    if cfg.get("ignore_localhost_requests") is not True:
+        return False
+    return client in LOCALHOST_ADDRESSES
+
+
+def resolve_route(scope):
+    """Map a request to the "METHOD /path/{template}" key used for route budgets"""
+    app = scope.get("app")
+    if app is not None:
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return f"{scope['method']} {route.path}"
+    # One shared bucket for every unknown path, so scanners can't mint a bucket per URL
+    return f"{scope['method']} <unmatched>"
+
+
+async def send_error(send, status, detail, retry_after):
+    """Send a minimal JSON error response with a Retry-After header"""
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, int(min(retry_after, 3600) + 0.999))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,27 +1,124 @@
-from fastapi import FastAPI, HTTPException, Depends, Body
+from fastapi import FastAPI, HTTPException, Depends, Body, Request, Response
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
 
 from pydantic import BaseModel
 from typing import List
-from sqlalchemy import create_engine, Integer, Column, String
+from sqlalchemy import Integer, Column, String
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from dotenv import load_dotenv
 
+from rateLimiter import RateLimitMiddleware
+from tagFilter import TagNameFilter
+from metrics import METRICS
+from queryTiming import DbTimingMiddleware, instrument_engine
+from profiler import SamplingProfiler, PROFILE_LOCK, MAX_DURATION, MIN_INTERVAL, MAX_INTERVAL
+from startupTimer import STARTUP_TIMER
+from database import create_database_engine
+from writeQueue import WriteQueue, DEFAULT_SETTINGS as WRITE_QUEUE_SETTINGS
+from invalidationBus import create_bus, CREATE, DELETE
+from tagStore import TagStore, DEFAULT_SETTINGS as TAG_STORE_SETTINGS
+
+import cfg
+
 import rites.logger as l
+import asyncio
+import math
 import os
+import threading
+import uuid
 
 
 # Resources
-DATABASE_URL = "sqlite:///./tags.db"
 LOGGER = l.get_sec_logger("logs", log_name="Server")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = None  # Created in the lifespan hook
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the database and warm up in-memory state when the server starts, not on import"""
+    global engine, WRITE_QUEUE, INVALIDATION_BUS, TAG_STORE, LOCAL_CACHES
+    STARTUP_TIMER.mark("uvicorn started")
+
+    engine = create_database_engine()
+    LOGGER.info(f"Using {engine.dialect.name} storage backend")
+    instrument_engine(engine)
+    SessionLocal.configure(bind=engine)
+    STARTUP_TIMER.mark("engine created")
+
+    # Create the database tables
+    Base.metadata.create_all(bind=engine)
+    STARTUP_TIMER.mark("schema checked")
+
+    # Other nodes may write a server database, without a bus nothing would tell us so every read has to hit it
+    INVALIDATION_BUS = create_bus()
+    LOCAL_CACHES = engine.dialect.name == "sqlite" or INVALIDATION_BUS is not None
+    if not LOCAL_CACHES:
+        LOGGER.warning("Shared database without an invalidation_bus, the tag filter, tag store and ETags are disabled")
+        TAG_FILTER.enabled = False
+
+    if TAG_FILTER.enabled:
+        TAG_FILTER.rebuild(get_all_tag_names)
+        TAG_FILTER.start_rebuild_loop(get_all_tag_names)
+    STARTUP_TIMER.mark("tag filter built")
+
+    # Optional resident copy of the table so reads skip the database entirely
+    tag_store_settings = cfg.get_section("tag_store", TAG_STORE_SETTINGS)
+    if LOCAL_CACHES and tag_store_settings["enabled"]:
+        TAG_STORE = TagStore()
+        TAG_STORE.load(iter_tag_rows())
+        TAG_STORE.start_reload_loop(iter_tag_rows, float(tag_store_settings["reload_interval"]))
+        LOGGER.info(f"Loaded {len(TAG_STORE)} tags into the in-memory store")
+        STARTUP_TIMER.mark("tag store loaded")
+
+    # Publish in-process metrics for the GUI now that every route is registered
+    db = SessionLocal()
+    try:
+        METRICS.start(getTagCount(db), len(app.routes))
+    finally:
+        db.close()
+    STARTUP_TIMER.mark("metrics published")
+
+    # Optional single-writer pipeline for bursts of creates and deletes
+    if cfg.get_section("write_queue", WRITE_QUEUE_SETTINGS)["enabled"]:
+        WRITE_QUEUE = WriteQueue(SessionLocal, Tag, on_commit=apply_local_change)
+        WRITE_QUEUE.start()
+        LOGGER.info("Write queue enabled")
+
+    # Keep caches in sync with writes handled by other nodes
+    if INVALIDATION_BUS is not None:
+        INVALIDATION_BUS.subscribe(apply_remote_change)
+        INVALIDATION_BUS.start()
+        LOGGER.info(f"Invalidation bus enabled ({type(INVALIDATION_BUS).__name__})")
+
+    LOGGER.info(STARTUP_TIMER.report())
+    yield
+
+    # uvicorn has drained connections by now, flush background writers before the engine goes away
+    LOGGER.info(f"Shutting down after {METRICS.requests_handled} requests")
+    if INVALIDATION_BUS is not None:
+        INVALIDATION_BUS.stop()
+        INVALIDATION_BUS = None
+    if WRITE_QUEUE is not None:
+        WRITE_QUEUE.stop()
+        WRITE_QUEUE = None
+    TAG_FILTER.stop_rebuild_loop()
+    if TAG_STORE is not None:
+        TAG_STORE.stop_reload_loop()
+        TAG_STORE = None
+    engine.dispose()
+    engine = None
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(DbTimingMiddleware)
 load_dotenv('.env')
-global requests_handled
-requests_handled = 0
 
 
 DATABASE_KEY = os.environ.get("DATABASE_KEY")
@@ -40,8 +137,102 @@ class Tag(Base):
     owner_id = Column(String, nullable=False)
 
 
-# Create the database tables
-Base.metadata.create_all(bind=engine)
+def get_all_tag_names():
+    db = SessionLocal()
+    try:
+        return [name for (name,) in db.query(Tag.name).all()]
+    finally:
+        db.close()
+
+
+def iter_tag_rows():
+    """Stream (name, message, owner, owner_id) for every tag, for loading the tag store"""
+    db = SessionLocal()
+    try:
+        yield from db.query(Tag.name, Tag.message, Tag.owner, Tag.owner_id).yield_per(10000)
+    finally:
+        db.close()
+
+
+# Negative lookup filter so unknown names don't cost a query, built in the lifespan hook
+TAG_FILTER = TagNameFilter()
+
+# Set in the lifespan hook when write_queue.enabled is on
+WRITE_QUEUE = None
+
+# Set in the lifespan hook when an invalidation_bus backend is configured
+INVALIDATION_BUS = None
+
+# Set in the lifespan hook when tag_store.enabled is on
+TAG_STORE = None
+
+# Cleared in the lifespan hook when other nodes can change the database without telling us
+LOCAL_CACHES = True
+
+# Bumped on every local or remote write, GET /tags hands it out as its ETag.
+# The per-process prefix keeps a restarted server from validating copies it never served.
+TAG_VERSION = 0
+TAG_VERSION_LOCK = threading.Lock()
+ETAG_PREFIX = uuid.uuid4().hex[:8]
+
+
+def bump_tag_version():
+    global TAG_VERSION
+    with TAG_VERSION_LOCK:
+        TAG_VERSION += 1
+
+
+def get_tags_etag():
+    return f'W/"{ETAG_PREFIX}-{TAG_VERSION}"'
+
+
+# Held across a direct commit and apply_local_change, so caches see writes in commit order.
+# The write queue needs no lock, its single writer thread calls apply_local_change itself.
+WRITE_LOCK = threading.Lock()
+
+
+def apply_local_change(op, name, tag=None):
+    """Patch local caches and tell other nodes after this node committed a create or delete"""
+    bump_tag_version()
+    if op == CREATE:
+        TAG_FILTER.add(name)
+        if TAG_STORE is not None:
+            TAG_STORE.add(tag.name, tag.message, tag.owner, tag.owner_id)
+        METRICS.adjust_tag_count(1)
+    else:
+        if TAG_STORE is not None:
+            TAG_STORE.remove(name)
+        METRICS.adjust_tag_count(-1)
+    publish_change(op, name)
+
+
+def apply_remote_change(op, name):
+    """Patch local caches after another node created or deleted a tag"""
+    bump_tag_version()
+    if op == CREATE:
+        TAG_FILTER.add(name)
+        if TAG_STORE is None:
+            # Nodes only publish committed writes, so the count moves by one without asking the database
+            METRICS.adjust_tag_count(1)
+            return
+        db = SessionLocal()
+        try:
+            tag = db.query(Tag).filter(Tag.name == name).first()
+        finally:
+            db.close()
+        if tag and TAG_STORE.add(tag.name, tag.message, tag.owner, tag.owner_id):
+            METRICS.adjust_tag_count(1)
+    elif op == DELETE:
+        # The Bloom filter can't forget names, its periodic rebuild takes care of that
+        if TAG_STORE is None:
+            METRICS.adjust_tag_count(-1)
+        elif TAG_STORE.remove(name):
+            METRICS.adjust_tag_count(-1)
+
+
+def publish_change(op, name):
+    if INVALIDATION_BUS is not None:
+        INVALIDATION_BUS.publish(op, name)
 
 
 # Pydantic schema for validation
@@ -77,6 +268,17 @@ class DeleteTagSchema(BaseModel):
         from_attributes = True
 
 
+# Pydantic schema for profiling
+class ProfileSchema(BaseModel):
+    key: str
+    seconds: float = 10
+    interval: float = 0.01
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -88,19 +290,34 @@ def get_db():
 
 # Routes
 @app.get("/tags", response_model=List[TagResponseSchema])
-def get_tags(db=Depends(get_db)):
-    global requests_handled
-    requests_handled += 1
-
+def get_tags(request: Request, response: Response, db=Depends(get_db)):
+    METRICS.count_request()
+
+    # Read the version before the rows, so a concurrent write can only make the ETag older than the body
+    if LOCAL_CACHES:
+        etag = get_tags_etag()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    if TAG_STORE is not None:
+        return TAG_STORE.all()
     return db.query(Tag).all()
 
 
 @app.get("/tags/{name}", response_model=TagResponseSchema)
 def get_tag(name: str, db=Depends(get_db)):
-    global requests_handled
-    requests_handled += 1
+    METRICS.count_request()
 
-    tag = db.query(Tag).filter(Tag.name == name).first()
+    if not TAG_FILTER.might_exist(name):
+        raise HTTPException(status_code=404, detail="Tag not found")
+
+    if TAG_STORE is not None:
+        tag = TAG_STORE.get(name)
+    else:
+        tag = db.query(Tag).filter(Tag.name == name).first()
+    TAG_FILTER.record_lookup(tag is not None)
 
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
@@ -109,53 +326,110 @@ def get_tag(name: str, db=Depends(get_db)):
 
 @app.post("/tags", response_model=dict)
 def create_tag(tag: TagSchema, db=Depends(get_db)):
-    global requests_handled
-    requests_handled += 1
+    METRICS.count_request()
 
     if tag.key != DATABASE_KEY:
         return {"success": False, "error": "Invalid key. Access denied."}
-    if tag.name in [t.name for t in db.query(Tag).all()]:
-        return {"success": False, "error": "Tag already exists"}
 
-    db_tag = Tag(name=tag.name, message=tag.message, owner=tag.owner, owner_id=tag.owner_id)
-    db.add(db_tag)
-    db.commit()
-    db.refresh(db_tag)
+    if WRITE_QUEUE is not None:
+        success, result = WRITE_QUEUE.create(name=tag.name, message=tag.message, owner=tag.owner, owner_id=tag.owner_id)
+        if not success:
+            return {"success": False, "error": result}
+        db_tag = result
+    else:
+        if tag.name in [t.name for t in db.query(Tag).all()]:
+            return {"success": False, "error": "Tag already exists"}
+
+        db_tag = Tag(name=tag.name, message=tag.message, owner=tag.owner, owner_id=tag.owner_id)
+        db.add(db_tag)
+        with WRITE_LOCK:
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another writer inserted the same name between our check and commit
+                db.rollback()
+                return {"success": False, "error": "Tag already exists"}
+            db.refresh(db_tag)
+            apply_local_change(CREATE, db_tag.name, db_tag)
+
     return {"success": True, "data": TagResponseSchema.model_validate(db_tag)}
 
 
 @app.delete("/tags/{name}", response_model=dict)
 def delete_tag(name: str, delete_tag: DeleteTagSchema = Body(...), db=Depends(get_db)):
-    global requests_handled
-    requests_handled += 1
+    METRICS.count_request()
 
     if delete_tag.key != DATABASE_KEY:
         return {"success": False, "error": "Invalid key. Access denied."}
 
-    tag = db.query(Tag).filter(Tag.name == name).first()
-    if not tag:
-        return {"success": False, "error": "Tag does not exist."}
+    if WRITE_QUEUE is not None:
+        success, error = WRITE_QUEUE.delete(name)
+        if not success:
+            return {"success": False, "error": error}
+    else:
+        # Delete and check the row count under the lock, so of concurrent deletes only the one that
+        # removed the row reports success and patches the caches
+        with WRITE_LOCK:
+            deleted = db.query(Tag).filter(Tag.name == name).delete()
+            db.commit()
+            if deleted != 1:
+                return {"success": False, "error": "Tag does not exist."}
+            apply_local_change(DELETE, name)
 
-    db.delete(tag)
-    db.commit()
     return {"success": True}
 
 
 @app.get("/stats", response_model=dict)
 def get_stats(db=Depends(get_db)):
-    global requests_handled
-    requests_handled += 1
+    METRICS.count_request()
 
     return {
         "tag_count": getTagCount(db),
         "requests_handled": getRequestsHandled(),
-        "endpoints_count": len([route for route in app.routes])
+        "endpoints_count": len([route for route in app.routes]),
+        "tag_filter": TAG_FILTER.get_stats(),
+        "write_queue": WRITE_QUEUE.get_stats() if WRITE_QUEUE is not None else None,
+        "invalidation_bus": INVALIDATION_BUS.get_stats() if INVALIDATION_BUS is not None else None,
+        "tag_store": TAG_STORE.get_stats() if TAG_STORE is not None else None
     }
 
 
+@app.post("/admin/profile")
+async def profile(profile_request: ProfileSchema):
+    METRICS.count_request()
+
+    if profile_request.key != DATABASE_KEY:
+        return {"success": False, "error": "Invalid key. Access denied."}
+    if not (math.isfinite(profile_request.seconds) and math.isfinite(profile_request.interval)):
+        return {"success": False, "error": "seconds and interval must be finite numbers."}
+    if not PROFILE_LOCK.acquire(blocking=False):
+        return {"success": False, "error": "A profile is already running."}
+
+    try:
+        seconds = min(max(profile_request.seconds, 0.1), MAX_DURATION)
+        profiler = SamplingProfiler(interval=min(max(profile_request.interval, MIN_INTERVAL), MAX_INTERVAL))
+        LOGGER.info(f"Profiling for {seconds:.1f}s...")
+
+        # Sleep on the event loop so the profile doesn't hold a threadpool worker, and join the
+        # sampler off the loop so a sample in progress can't stall other requests
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(profiler.stop)
+    finally:
+        PROFILE_LOCK.release()
+
+    LOGGER.info(f"Profile finished with {profiler.sample_count} samples")
+    return PlainTextResponse(profiler.collapsed())
+
+
 def getTagCount(db):
     return db.query(Tag).count()
 
 
 def getRequestsHandled():
-    return requests_handled
+    return METRICS.requests_handled
+
+
+STARTUP_TIMER.mark("server module imported")
@@ -0,0 +1,28 @@
+import time
+
+
+class StartupTimer:
+    """Records how long each startup phase takes, measured from the first import of this module"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.last = self.origin
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, phase):
+        """Close the current phase under the name `phase`"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.origin
+
+    def report(self):
+        lines = [f"Startup took {self.total() * 1000:.1f} ms"]
+        for phase, duration in self.phases:
+            lines.append(f"    {phase:<28} {duration * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+STARTUP_TIMER = StartupTimer()
@@ -0,0 +1,153 @@
+import hashlib
+import math
+import threading
+import time
+
+from rites.logger import get_sec_logger
+
+import cfg
+
+LOGGER = get_sec_logger("logs", log_name="TagFilter")
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "expected_tags": 100000,
+    "false_positive_rate": 0.01,
+    "rebuild_interval": 300,
+}
+
+
+class BloomFilter:
+    """Fixed size Bloom filter using double hashing over a single blake2b digest"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, int(capacity))
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TagNameFilter:
+    """Negative lookup filter for tag names, rebuilt from the database to forget deleted tags"""
+
+    def __init__(self, settings=None):
+        if settings is None:
+            settings = cfg.get_section("tag_filter", DEFAULT_SETTINGS)
+        self.enabled = settings.get("enabled", True)
+        self.expected_tags = int(settings["expected_tags"])
+        self.error_rate = float(settings["false_positive_rate"])
+        self.rebuild_interval = float(settings["rebuild_interval"])
+
+        self.bloom = BloomFilter(self.expected_tags, self.error_rate)
+        self.ready = False
+        self.lock = threading.Lock()
+        self.pending: list[str] | None = None
+        self.rebuild_thread = None
+        self.stop_event = threading.Event()
+
+        # Metrics
+        self.definite_misses = 0
+        self.false_positives = 0
+        self.hits = 0
+        self.last_rebuild = None
+
+    def rebuild(self, names_func):
+        """Rebuild the filter from `names_func`, which returns every existing tag name"""
+        start = time.perf_counter()
+        with self.lock:
+            self.pending = []
+
+        try:
+            names = names_func()
+            bloom = BloomFilter(max(self.expected_tags, len(names) * 2), self.error_rate)
+            for name in names:
+                bloom.add(name)
+        except Exception:
+            with self.lock:
+                self.pending = None
+            raise
+
+        # Tags created while we were reading the table must survive the swap
+        with self.lock:
+            for name in self.pending:
+                bloom.add(name)
+            self.pending = None
+            self.bloom = bloom
+            self.ready = True
+            self.last_rebuild = time.time()
+
+        LOGGER.info(f"Rebuilt tag filter with {len(names)} names in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def start_rebuild_loop(self, names_func):
+        """Periodically rebuild the filter in a daemon thread"""
+        if not self.enabled or self.rebuild_thread is not None:
+            return
+
+        def loop():
+            while not self.stop_event.wait(self.rebuild_interval):
+                try:
+                    self.rebuild(names_func)
+                except Exception as e:
+                    LOGGER.error(f"Failed to rebuild tag filter: {e}")
+
+        self.stop_event.clear()
+        self.rebuild_thread = threading.Thread(target=loop, name="TagFilterRebuild", daemon=True)
+        self.rebuild_thread.start()
+
+    def stop_rebuild_loop(self, timeout=5):
+        """Stop the rebuild thread, waiting for a rebuild in progress to finish"""
+        if self.rebuild_thread is None:
+            return
+        self.stop_event.set()
+        self.rebuild_thread.join(timeout)
+        self.rebuild_thread = None
+
+    def add(self, name):
+        with self.lock:
+            self.bloom.add(name)
+            if self.pending is not None:
+                self.pending.append(name)
+
+    def might_exist(self, name):
+        """False means the tag definitely doesn't exist; True means the database has to be asked"""
+        if not self.enabled or not self.ready:
+            return True
+        if name in self.bloom:
+            return True
+        self.definite_misses += 1
+        return False
+
+    def record_lookup(self, found):
+        """Record the database outcome of a lookup the filter let through"""
+        if not self.enabled or not self.ready:
+            return
+        if found:
+            self.hits += 1
+        else:
+            self.false_positives += 1
+
+    def get_stats(self):
+        negatives = self.false_positives + self.definite_misses
+        return {
+            "enabled": self.enabled,
+            "size_bytes": len(self.bloom.bits),
+            "hash_count": self.bloom.hash_count,
+            "definite_misses": self.definite_misses,
+            "false_positives": self.false_positives,
+            "hits": self.hits,
+            "false_positive_rate": self.false_positives / negatives if negatives else 0.0,
+            "last_rebuild": self.last_rebuild,
+        }
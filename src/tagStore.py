@@ -0,0 +1,194 @@
+import sys
+import threading
+import time
+from array import array
+
+from rites.logger import get_sec_logger
+
+LOGGER = get_sec_logger("logs", log_name="TagStore")
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "reload_interval": 300,
+}
+
+
+class TagStore:
+    """Compact, column oriented copy of the tags table for serving reads from memory
+
+    Rows live in parallel columns instead of one object per tag. Owners repeat across many
+    tags, so each distinct (owner, owner_id) pair is interned once and rows only keep a
+    4 byte reference to it. Deletes move the last row into the hole to keep columns dense.
+    """
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.names: list[str] = []
+        self.messages: list[str] = []
+        self.owner_refs = array("I")
+
+        self.owners: list[tuple[str, str]] = []
+        self.owner_index: dict[tuple[str, str], int] = {}
+
+        self.lock = threading.Lock()
+        self.pending: list[tuple] | None = None
+        self.reload_thread = None
+        self.stop_event = threading.Event()
+
+        # Metrics
+        self.last_reload = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def _owner_ref(self, owner, owner_id):
+        key = (sys.intern(owner), sys.intern(owner_id))
+        ref = self.owner_index.get(key)
+        if ref is None:
+            ref = len(self.owners)
+            self.owners.append(key)
+            self.owner_index[key] = ref
+        return ref
+
+    def load(self, rows):
+        """Replace the contents with `rows` of (name, message, owner, owner_id)
+
+        Rows are read into a fresh store without holding the lock. Changes made in the meantime
+        are replayed on top before the swap, so a reload can't undo a write it raced with.
+        """
+        with self.lock:
+            self.pending = []
+
+        try:
+            fresh = TagStore()
+            for name, message, owner, owner_id in rows:
+                fresh._append(name, message, owner, owner_id)
+        except Exception:
+            with self.lock:
+                self.pending = None
+            raise
+
+        with self.lock:
+            for change in self.pending:
+                fresh._apply(*change)
+            self.pending = None
+            self.index, self.names, self.messages, self.owner_refs = fresh.index, fresh.names, fresh.messages, fresh.owner_refs
+            self.owners, self.owner_index = fresh.owners, fresh.owner_index
+            self.last_reload = time.time()
+
+    def start_reload_loop(self, rows_func, interval):
+        """Periodically reload from `rows_func()` in a daemon thread, picking up writes no one told us about"""
+        if self.reload_thread is not None:
+            return
+
+        def loop():
+            while not self.stop_event.wait(interval):
+                start = time.perf_counter()
+                try:
+                    self.load(rows_func())
+                except Exception as e:
+                    LOGGER.error(f"Failed to reload tag store: {e}")
+                    continue
+                LOGGER.info(f"Reloaded {len(self)} tags in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        self.stop_event.clear()
+        self.reload_thread = threading.Thread(target=loop, name="TagStoreReload", daemon=True)
+        self.reload_thread.start()
+
+    def stop_reload_loop(self, timeout=5):
+        """Stop the reload thread, waiting for a reload in progress to finish"""
+        if self.reload_thread is None:
+            return
+        self.stop_event.set()
+        self.reload_thread.join(timeout)
+        self.reload_thread = None
+
+    def _append(self, name, message, owner, owner_id):
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.messages.append(message)
+        self.owner_refs.append(self._owner_ref(owner, owner_id))
+
+    def _apply(self, name, fields):
+        """Upsert `name` with (message, owner, owner_id), or remove it when `fields` is None"""
+        row = self.index.get(name)
+        if fields is None:
+            if row is None:
+                return False
+            del self.index[name]
+            last = len(self.names) - 1
+            if row != last:
+                self.names[row] = self.names[last]
+                self.messages[row] = self.messages[last]
+                self.owner_refs[row] = self.owner_refs[last]
+                self.index[self.names[row]] = row
+            self.names.pop()
+            self.messages.pop()
+            self.owner_refs.pop()
+            return True
+
+        message, owner, owner_id = fields
+        if row is None:
+            self._append(name, message, owner, owner_id)
+            return True
+        self.messages[row] = message
+        self.owner_refs[row] = self._owner_ref(owner, owner_id)
+        return False
+
+    def _change(self, name, fields):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((name, fields))
+            return self._apply(name, fields)
+
+    def add(self, name, message, owner, owner_id):
+        """Add or update a tag, returns False if the name was already stored"""
+        return self._change(name, (message, owner, owner_id))
+
+    def remove(self, name):
+        """Remove a tag, returns False if the name wasn't stored"""
+        return self._change(name, None)
+
+    def _row(self, row):
+        owner, owner_id = self.owners[self.owner_refs[row]]
+        return {"name": self.names[row], "message": self.messages[row], "owner": owner, "owner_id": owner_id}
+
+    def get(self, name):
+        with self.lock:
+            row = self.index.get(name)
+            return self._row(row) if row is not None else None
+
+    def all(self):
+        with self.lock:
+            return [self._row(row) for row in range(len(self.names))]
+
+    def memory_usage(self, sample_size=1000):
+        """Approximate bytes held by the store, with string sizes extrapolated from evenly spaced samples
+
+        Sampling keeps this cheap enough for /stats, walking a million rows would hold the lock for ~0.5 s.
+        """
+        with self.lock:
+            total = sum(sys.getsizeof(container) for container in (
+                self.index, self.names, self.messages, self.owner_refs, self.owners, self.owner_index))
+            total += _sampled_size(self.names, sample_size,
+                                   lambda i: sys.getsizeof(self.names[i]) + sys.getsizeof(self.messages[i]))
+            total += _sampled_size(self.owners, sample_size,
+                                   lambda i: sum(sys.getsizeof(part) for part in (self.owners[i], *self.owners[i])))
+            return int(total)
+
+    def get_stats(self):
+        tags = len(self.names)
+        return {
+            "tags": tags,
+            "owners": len(self.owners),
+            "bytes_per_tag": self.memory_usage() / tags if tags else 0.0,
+            "last_reload": self.last_reload,
+        }
+
+
+def _sampled_size(column, sample_size, size_of):
+    """Sum of size_of(i) over `column`, estimated from at most `sample_size` evenly spaced rows"""
+    if not column:
+        return 0
+    rows = range(0, len(column), max(1, len(column) // sample_size))
+    return sum(size_of(i) for i in rows) * len(column) / len(rows)
@@ -19,8 +19,10 @@ def ensure_directory_exists(directory_path):
 
 def fetch_tags(base_url="http://localhost:8000"):
     """Fetch all tags from the server API"""
+    import httpClient
+
     try:
-        response = requests.get(f"{base_url}/tags")
+        response = httpClient.get(f"{base_url}/tags")
 
         if response.status_code == 200:
             LOGGER.info(f"Successfully fetched {len(response.json())} tags from the server")
@@ -33,70 +35,80 @@ def fetch_tags(base_url="http://localhost:8000"):
         return None
 
 
-def export_data_as_csv(suffix: str = "") -> bool:
-    """Export tag data to CSV file"""
+def get_export_path(suffix: str = "") -> str:
+    """Path of the CSV export, named after `suffix` or the current time"""
+    if suffix:
+        return f"./data/tags_export_{suffix}.csv"
+
+    from datetime import datetime
+    return f"./data/tags_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+def export_data_as_csv(suffix: str = "", cancel=None) -> bool:
+    """Export tag data to CSV file, giving up early once the optional `cancel` event is set"""
     if suffix:
         LOGGER.info(f"Exporting tag data to CSV with suffix: {suffix}...")
     else:
         LOGGER.info("Exporting tag data to CSV...")
 
     # Ensure data directory exists
-    data_dir = "./data"
-    if not ensure_directory_exists(data_dir):
+    if not ensure_directory_exists("./data"):
         LOGGER.error("Failed to create data directory for auto-export")
         return False
 
-    # Generate filename with timestamp
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    if suffix:
-        export_path = f"{data_dir}/tags_export_{suffix}.csv"
-    else:
-        export_path = f"{data_dir}/tags_export_{timestamp}.csv"
-
+    export_path = get_export_path(suffix)
+    # Stream tags into a temporary file so an interrupted export never clobbers the previous one
+    temp_path = export_path + ".tmp"
+    db = None
+    own_engine = None
     try:
-        from sqlalchemy import create_engine
         from sqlalchemy.orm import sessionmaker
-        from server import Tag, DATABASE_URL
-
-        # Create a database session
-        engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+        import server
+        from server import Tag
+        from database import create_database_engine
+
+        # Share the running server's pool; only a standalone export opens (and disposes) its own
+        engine = server.engine
+        if engine is None:
+            engine = own_engine = create_database_engine()
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
         db = SessionLocal()
 
-        # Get all tags from the database
-        tags = db.query(Tag).all()
-
-        # Convert SQLAlchemy objects to dictionaries
-        tag_dicts = []
-        for tag in tags:
-            tag_dicts.append({
-                "name": tag.name,
-                "message": tag.message,
-                "owner": tag.owner,
-                "owner_id": tag.owner_id
-            })
-
-        # Export to CSV
-        ret = True
-        if tag_dicts:
-            import csv
-            with open(export_path, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = tag_dicts[0].keys()
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for tag in tag_dicts:
-                    writer.writerow(tag)
-
-            LOGGER.info(f"Successfully auto-exported {len(tag_dicts)} tags to {export_path}")
-        else:
+        count = 0
+        import csv
+        with open(temp_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["name", "message", "owner", "owner_id"])
+            for tag in db.query(Tag).yield_per(1000):
+                if cancel is not None and cancel.is_set():
+                    LOGGER.warning(f"Export cancelled after {count} tags")
+                    return False
+                writer.writerow([tag.name, tag.message, tag.owner, tag.owner_id])
+                count += 1
+
+        if not count:
             LOGGER.info("No tags to export")
-            ret = False
+            return False
 
-        # Close the session
-        db.close()
-        return ret
+        os.replace(temp_path, export_path)
+        LOGGER.info(f"Successfully auto-exported {count} tags to {export_path}")
+        return True
     except Exception as e:
         LOGGER.error(f"Failed to auto-export tags: {str(e)}")
         return False
+    finally:
+        # Gone already after a successful export; otherwise it's a partial file
+        remove_file(temp_path)
+        if db is not None:
+            db.close()
+        if own_engine is not None:
+            own_engine.dispose()
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        LOGGER.error(f"Failed to remove {path}: {e}")
@@ -0,0 +1,208 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from sqlalchemy.exc import IntegrityError
+from rites.logger import get_sec_logger
+
+import cfg
+
+LOGGER = get_sec_logger("logs", log_name="WriteQueue")
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "max_batch": 64,
+    "max_delay_ms": 5,
+    "result_timeout": 10,
+}
+
+CREATE = "create"
+DELETE = "delete"
+
+
+class WriteQueue:
+    """Coalesces tag creates and deletes into small batches committed by a single writer thread
+
+    Every submitted operation gets its own Future resolving to (True, tag) or (False, error),
+    so callers see the same per-request outcome as if they had committed on their own.
+    `on_commit(op, name, tag)` is called from the writer for every successful operation in
+    commit order, before its Future resolves.
+    """
+
+    def __init__(self, session_factory, model, settings=None, on_commit=None):
+        if settings is None:
+            settings = cfg.get_section("write_queue", DEFAULT_SETTINGS)
+        self.session_factory = session_factory
+        self.model = model
+        self.on_commit = on_commit
+        self.max_batch = int(settings["max_batch"])
+        self.max_delay = float(settings["max_delay_ms"]) / 1000
+        self.result_timeout = float(settings["result_timeout"])
+
+        self.queue: queue.Queue = queue.Queue()
+        self.thread = None
+        self.stopped = False
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.operations = 0
+
+    def start(self):
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="WriteQueue", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        """Commit whatever is still queued and stop the writer"""
+        if self.thread is None:
+            return
+        # Under the lock so no submission can land behind the sentinel
+        with self.lock:
+            self.stopped = True
+            self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def submit(self, op, **fields):
+        future = Future()
+        with self.lock:
+            if self.stopped:
+                future.set_exception(RuntimeError("Write queue is stopped"))
+            else:
+                self.queue.put((op, fields, future))
+        return future
+
+    def create(self, **fields):
+        return self._wait(self.submit(CREATE, **fields))
+
+    def delete(self, name):
+        return self._wait(self.submit(DELETE, name=name))
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.result_timeout)
+        except FutureTimeoutError:
+            # Only an operation the writer hasn't picked up yet is known not to happen
+            if future.cancel():
+                return False, "Write queue timed out"
+            raise
+
+    def _run(self):
+        running = True
+        while running:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            # Gather more work until the batch is full or the latency window closes
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+        # Anything left behind after a stop still gets written
+        leftovers = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None:
+                leftovers.append(item)
+        if leftovers:
+            self._write(leftovers)
+
+    def _write(self, batch):
+        """Commit `batch`, skipping operations whose caller gave up and failing the rest on errors"""
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            self._commit_batch(batch)
+        except Exception as e:
+            LOGGER.error(f"Write batch failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _commit_batch(self, batch):
+        Tag = self.model
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            names = {fields["name"] for _, fields, _ in batch}
+            existing = {tag.name: tag for tag in db.query(Tag).filter(Tag.name.in_(names)).all()}
+
+            # Apply operations in arrival order against the batch's view of the table. Flushes write the
+            # creates queued so far too, so they sit under the same conflict fallback as the commit.
+            results = []
+            try:
+                for op, fields, future in batch:
+                    name = fields["name"]
+                    if op == CREATE:
+                        if name in existing:
+                            results.append((op, name, future, (False, "Tag already exists")))
+                            continue
+                        tag = Tag(**fields)
+                        db.add(tag)
+                        existing[name] = tag
+                        results.append((op, name, future, (True, tag)))
+                    else:
+                        tag = existing.pop(name, None)
+                        if tag is None:
+                            results.append((op, name, future, (False, "Tag does not exist.")))
+                            continue
+                        if tag.id is None:
+                            db.expunge(tag)
+                        else:
+                            # Flush now so a later create of the same name isn't inserted before this delete
+                            db.delete(tag)
+                            db.flush()
+                        results.append((op, name, future, (True, None)))
+
+                db.commit()
+            except IntegrityError:
+                # Someone outside this queue wrote a conflicting row, fall back to one commit per operation
+                db.rollback()
+                if len(batch) == 1:
+                    batch[0][2].set_result((False, "Tag already exists"))
+                    return
+                db.close()
+                self._commit_individually(batch)
+                return
+
+            self.batches += 1
+            self.operations += len(batch)
+            for op, name, future, result in results:
+                success, value = result
+                if success and self.on_commit is not None:
+                    try:
+                        self.on_commit(op, name, value)
+                    except Exception as e:
+                        LOGGER.error(f"Post-commit handling of {op} {name} failed: {e}")
+                future.set_result(result)
+        finally:
+            db.close()
+
+    def _commit_individually(self, batch):
+        for item in batch:
+            try:
+                self._commit_batch([item])
+            except Exception as e:
+                item[2].set_exception(e)
+
+    def get_stats(self):
+        return {
+            "batches": self.batches,
+            "operations": self.operations,
+            "average_batch": self.operations / self.batches if self.batches else 0.0,
+            "queued": self.queue.qsize(),
+        }
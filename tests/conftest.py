@@ -0,0 +1,77 @@
+import json
+import os
+import pathlib
+import sys
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+TEST_KEY = "test-key"
+
+# A PostgreSQL URL in the environment is picked up before the tests override DATABASE_URL per backend
+POSTGRES_URL = os.environ.get("DATABASE_URL") if os.environ.get("DATABASE_URL", "").startswith("postgresql") else None
+
+WORKDIR = None
+
+
+def pytest_configure(config):
+    """The server reads config.json and writes logs/ relative to the working directory, set one up before collection"""
+    global WORKDIR
+    WORKDIR = pathlib.Path(tempfile.mkdtemp(prefix="globaltags-tests-"))
+    with open(WORKDIR / "config.json", "w") as f:
+        json.dump({"host": "127.0.0.1", "port": 8080, "ignore_localhost_requests": False,
+                   "rate_limit": {"enabled": False}}, f)
+    os.makedirs(WORKDIR / "logs", exist_ok=True)
+    os.chdir(WORKDIR)
+    os.environ["DATABASE_KEY"] = TEST_KEY
+
+
+def pytest_unconfigure(config):
+    # pytest restores the starting directory, but the server's loggers write relative paths at exit
+    if WORKDIR is not None:
+        os.chdir(WORKDIR)
+
+
+@pytest.fixture(scope="session")
+def workdir():
+    return WORKDIR
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def database_url(request, workdir, monkeypatch):
+    if request.param == "sqlite":
+        url = f"sqlite:///{workdir / f'{request.node.name}.db'}"
+    else:
+        if POSTGRES_URL is None:
+            pytest.skip("set DATABASE_URL to a postgresql+psycopg:// URL to test PostgreSQL")
+        from sqlalchemy import create_engine
+        try:
+            engine = create_engine(POSTGRES_URL)
+            engine.connect().close()
+            engine.dispose()
+        except Exception as e:
+            pytest.skip(f"PostgreSQL not reachable: {e}")
+        url = POSTGRES_URL
+
+    monkeypatch.setenv("DATABASE_URL", url)
+    return url
+
+
+@pytest.fixture
+def client(database_url):
+    import server  # Not at the top, it needs the working directory from pytest_configure
+
+    with TestClient(server.app) as test_client:
+        # PostgreSQL outlives the test, start every test from an empty table
+        db = server.SessionLocal()
+        try:
+            db.query(server.Tag).delete()
+            db.commit()
+        finally:
+            db.close()
+        server.METRICS.tag_count = 0
+        yield test_client
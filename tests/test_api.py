@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+from conftest import TEST_KEY
+
+
+def create(client, name, message="hello", key=TEST_KEY):
+    return client.post("/tags", json={"name": name, "message": message, "owner": "owner", "owner_id": "1", "key": key})
+
+
+def delete(client, name, key=TEST_KEY):
+    return client.request("DELETE", f"/tags/{name}", json={"key": key})
+
+
+def test_create_and_get(client):
+    response = create(client, "alpha")
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "data": {"name": "alpha", "message": "hello", "owner_id": "1"}}
+
+    response = client.get("/tags/alpha")
+    assert response.status_code == 200
+    assert response.json() == {"name": "alpha", "message": "hello", "owner_id": "1"}
+    assert [tag["name"] for tag in client.get("/tags").json()] == ["alpha"]
+
+
+def test_create_duplicate(client):
+    assert create(client, "alpha").json()["success"]
+
+    response = create(client, "alpha", message="other")
+    assert response.json() == {"success": False, "error": "Tag already exists"}
+    assert client.get("/tags/alpha").json()["message"] == "hello"
+
+
+def test_create_with_wrong_key(client):
+    assert create(client, "alpha", key="wrong").json()["success"] is False
+    assert client.get("/tags/alpha").status_code == 404
+
+
+def test_get_missing(client):
+    assert client.get("/tags/missing").status_code == 404
+
+
+def test_delete(client):
+    create(client, "alpha")
+
+    assert delete(client, "alpha").json() == {"success": True}
+    assert client.get("/tags/alpha").status_code == 404
+    assert delete(client, "alpha").json()["success"] is False
+
+
+def test_stats(client):
+    create(client, "alpha")
+    create(client, "beta")
+    delete(client, "alpha")
+
+    stats = client.get("/stats").json()
+    assert stats["tag_count"] == 1
+    assert stats["requests_handled"] > 0
+
+
+def test_concurrent_deletes_succeed_once_per_tag(client):
+    names = [f"tag{i}" for i in range(20)]
+    for name in names:
+        assert create(client, name).json()["success"]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda name: delete(client, name).json(), names * 4))
+
+    assert sum(result["success"] for result in results) == 20
+    assert all(result == {"success": False, "error": "Tag does not exist."} for result in results if not result["success"])
+    assert server.METRICS.tag_count == 0
+    assert client.get("/stats").json()["tag_count"] == 0
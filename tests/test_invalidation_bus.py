@@ -0,0 +1,210 @@
+import json
+import socket
+import time
+
+import pytest
+
+import invalidationBus
+import server
+from invalidationBus import BrokerBus, MemoryBus, UdpBus, CREATE, DELETE
+from tagStore import TagStore
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def insert_remote_tag(name):
+    """Stand-in for another node committing to the shared database"""
+    db = server.SessionLocal()
+    try:
+        db.add(server.Tag(name=name, message="remote", owner="owner", owner_id="2"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def delete_remote_tag(name):
+    db = server.SessionLocal()
+    try:
+        db.query(server.Tag).filter(server.Tag.name == name).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture(params=[False, True], ids=["database", "tag_store"])
+def node(request, client, monkeypatch):
+    """This test process as the receiving node, optionally serving reads from a TagStore"""
+    if request.param:
+        monkeypatch.setattr(server, "TAG_STORE", TagStore())
+    return client
+
+
+@pytest.fixture
+def memory_buses():
+    sender, receiver = MemoryBus("test_tags"), MemoryBus("test_tags")
+    receiver.subscribe(server.apply_remote_change)
+    sender.start()
+    receiver.start()
+    yield sender, receiver
+    sender.stop()
+    receiver.stop()
+
+
+def test_remote_create_and_delete(node, memory_buses):
+    sender, receiver = memory_buses
+
+    insert_remote_tag("remote")
+    sender.publish(CREATE, "remote")
+    assert node.get("/tags/remote").json()["message"] == "remote"
+    assert server.METRICS.tag_count == 1
+    assert receiver.version == sender.version
+
+    delete_remote_tag("remote")
+    sender.publish(DELETE, "remote")
+    assert node.get("/tags/remote").status_code == 404
+    assert server.METRICS.tag_count == 0
+
+
+def test_remote_delete_of_unknown_tag_keeps_count(client, memory_buses, monkeypatch):
+    # Only a node with a store can tell, without a store the count trusts that the sender committed the delete
+    monkeypatch.setattr(server, "TAG_STORE", TagStore())
+    sender, _ = memory_buses
+
+    sender.publish(DELETE, "never-existed")
+    assert server.METRICS.tag_count == 0
+
+
+def test_remote_changes_dont_count_tags_in_the_database(node, memory_buses, monkeypatch):
+    sender, _ = memory_buses
+    monkeypatch.setattr(server, "getTagCount", lambda db: pytest.fail("counted the tags table"))
+
+    insert_remote_tag("remote")
+    sender.publish(CREATE, "remote")
+    delete_remote_tag("remote")
+    sender.publish(DELETE, "remote")
+    assert server.METRICS.tag_count == 0
+
+
+def test_remote_change_invalidates_etag(node, memory_buses):
+    sender, _ = memory_buses
+    etag = node.get("/tags").headers["etag"]
+
+    insert_remote_tag("remote")
+    sender.publish(CREATE, "remote")
+    response = node.get("/tags", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [tag["name"] for tag in response.json()] == ["remote"]
+
+
+@pytest.fixture
+def udp_buses():
+    sender_address, receiver_address = f"127.0.0.1:{free_port()}", f"127.0.0.1:{free_port()}"
+    sender = UdpBus("test_tags", sender_address, [receiver_address])
+    receiver = UdpBus("test_tags", receiver_address, [sender_address])
+    received = []
+    receiver.subscribe(lambda op, name: received.append((op, name)))
+    sender.start()
+    receiver.start()
+    yield sender, receiver, received
+    sender.stop()
+    receiver.stop()
+
+
+def test_udp_delivery(udp_buses):
+    sender, _, received = udp_buses
+
+    sender.publish(CREATE, "remote")
+    assert wait_for(lambda: received == [(CREATE, "remote")])
+
+
+def test_udp_survives_malformed_datagrams(udp_buses):
+    sender, _, received = udp_buses
+
+    # Sent from the peer's own socket, so only the payload is wrong
+    for garbage in (b"not json", b"5", b'{"channel": "test_tags"}'):
+        sender.sock.sendto(garbage, sender.peers[0])
+    sender.publish(DELETE, "remote")
+    assert wait_for(lambda: received == [(DELETE, "remote")])
+
+
+def test_udp_rejects_unknown_senders(udp_buses):
+    sender, receiver, received = udp_buses
+    stranger = UdpBus("test_tags", f"127.0.0.1:{free_port()}", [f"{receiver.bind[0]}:{receiver.bind[1]}"])
+    stranger.start()
+    try:
+        stranger.publish(DELETE, "forged")
+        assert wait_for(lambda: receiver.rejected == 1)
+    finally:
+        stranger.stop()
+
+    sender.publish(CREATE, "genuine")
+    assert wait_for(lambda: received == [(CREATE, "genuine")])
+
+
+def test_udp_restart_on_the_same_address(udp_buses):
+    sender, receiver, received = udp_buses
+
+    started = time.monotonic()
+    receiver.stop()
+    assert time.monotonic() - started < invalidationBus.LISTEN_TIMEOUT
+    assert receiver.thread is None
+
+    receiver.start()
+    sender.publish(CREATE, "after restart")
+    assert wait_for(lambda: received == [(CREATE, "after restart")])
+
+
+class FlakyBus(BrokerBus):
+    """Broker bus whose connection drops once and then refuses the first reconnect attempt"""
+
+    def __init__(self):
+        super().__init__("test_tags")
+        self.events = ["drop", "refuse"]
+        self.inbox = []
+
+    def _connect(self):
+        if self.events and self.events[0] == "refuse":
+            self.events.pop(0)
+            raise ConnectionError("connection refused")
+
+    def _receive(self):
+        if self.events and self.events[0] == "drop":
+            self.events.pop(0)
+            raise ConnectionError("connection reset")
+        while self.inbox:
+            self._deliver(self.inbox.pop(0))
+        time.sleep(0.01)
+
+    def _send(self, message):
+        pass
+
+
+def test_broker_bus_reconnects_with_backoff(monkeypatch):
+    monkeypatch.setattr(invalidationBus, "RECONNECT_DELAY", 0.01)
+    bus = FlakyBus()
+    received = []
+    bus.subscribe(lambda op, name: received.append((op, name)))
+    bus.start()
+    try:
+        assert wait_for(lambda: bus.get_stats()["reconnects"] == 1)
+        assert bus.get_stats()["listener"] == "connected"
+
+        bus.inbox.append(json.dumps({"node": "other", "version": 1, "op": CREATE, "name": "remote"}))
+        assert wait_for(lambda: received == [(CREATE, "remote")])
+    finally:
+        bus.stop()
+    assert bus.thread is None
+    assert bus.get_stats()["listener"] == "stopped"
@@ -0,0 +1,24 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import cfg
+import server
+
+
+def live_threads(name):
+    return [thread for thread in threading.enumerate() if thread.name == name]
+
+
+def test_restarts_dont_leak_background_threads(database_url, monkeypatch):
+    monkeypatch.setattr(cfg, "CONFIG", {**cfg.load(), "tag_store": {"enabled": True}})
+
+    for _ in range(3):
+        with TestClient(server.app) as client:
+            assert client.get("/tags").status_code == 200
+            assert len(live_threads("TagFilterRebuild")) == 1
+            assert len(live_threads("TagStoreReload")) == 1
+
+    assert live_threads("TagFilterRebuild") == []
+    assert live_threads("TagStoreReload") == []
+    assert server.TAG_STORE is None
@@ -0,0 +1,22 @@
+import threading
+
+from metrics import ServerMetrics
+
+
+def test_concurrent_updates_are_not_lost():
+    metrics = ServerMetrics()
+
+    def work():
+        for _ in range(10000):
+            metrics.count_request()
+            metrics.adjust_tag_count(1)
+            metrics.adjust_tag_count(-1)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.snapshot()["requests_handled"] == 80000
+    assert metrics.snapshot()["tag_count"] == 0
@@ -0,0 +1,111 @@
+import threading
+
+import pytest
+
+import server
+from invalidationBus import CREATE, DELETE
+from tagStore import TagStore
+from writeQueue import WriteQueue
+
+
+def test_add_is_an_upsert():
+    store = TagStore()
+    assert store.add("alpha", "hello", "owner", "1")
+    assert not store.add("alpha", "changed", "other", "2")
+
+    assert len(store) == 1
+    assert store.get("alpha") == {"name": "alpha", "message": "changed", "owner": "other", "owner_id": "2"}
+
+
+def test_remove_keeps_columns_dense():
+    store = TagStore()
+    for name in ("a", "b", "c"):
+        store.add(name, name, "owner", "1")
+
+    assert store.remove("a")
+    assert not store.remove("a")
+    assert sorted(tag["name"] for tag in store.all()) == ["b", "c"]
+    assert store.get("c")["message"] == "c"
+
+
+def test_reload_replays_concurrent_changes():
+    store = TagStore()
+    store.load([("stale", "old", "owner", "1")])
+
+    def rows():
+        # The snapshot was read before these writes committed
+        yield ("kept", "old", "owner", "1")
+        yield ("deleted", "old", "owner", "1")
+        store.add("kept", "new", "owner", "1")
+        store.remove("deleted")
+        store.add("created", "new", "owner", "1")
+
+    store.load(rows())
+    assert sorted(tag["name"] for tag in store.all()) == ["created", "kept"]
+    assert store.get("kept")["message"] == "new"
+    assert store.get_stats()["bytes_per_tag"] > 0
+
+
+@pytest.fixture
+def store_with_queue(client, monkeypatch):
+    """Write queue that batches everything submitted within 50 ms, feeding a fresh TagStore"""
+    store = TagStore()
+    monkeypatch.setattr(server, "TAG_STORE", store)
+    queue = WriteQueue(server.SessionLocal, server.Tag,
+                       {"max_batch": 64, "max_delay_ms": 50, "result_timeout": 5},
+                       on_commit=server.apply_local_change)
+    queue.start()
+    yield store, queue
+    queue.stop()
+
+
+def submit_together(queue, *operations):
+    """Submit operations back to back so they land in the same batch, then wait for all of them"""
+    futures = [queue.submit(op, **fields) for op, fields in operations]
+    return [future.result(timeout=5) for future in futures]
+
+
+def tag_fields(name, message):
+    return {"name": name, "message": message, "owner": "owner", "owner_id": "1"}
+
+
+def test_queued_create_and_delete_in_one_batch(client, store_with_queue):
+    store, queue = store_with_queue
+
+    results = submit_together(queue, (CREATE, tag_fields("alpha", "hello")), (DELETE, {"name": "alpha"}))
+    assert [success for success, _ in results] == [True, True]
+    assert store.get("alpha") is None
+    assert client.get("/tags/alpha").status_code == 404
+
+
+def test_queued_delete_and_recreate_in_one_batch(client, store_with_queue):
+    store, queue = store_with_queue
+    queue.create(**tag_fields("alpha", "old"))
+
+    results = submit_together(queue, (DELETE, {"name": "alpha"}), (CREATE, tag_fields("alpha", "new")))
+    assert [success for success, _ in results] == [True, True]
+    assert store.get("alpha")["message"] == "new"
+    assert client.get("/tags/alpha").json()["message"] == "new"
+
+
+def test_concurrent_direct_writes_keep_store_in_sync(client, monkeypatch):
+    store = TagStore()
+    monkeypatch.setattr(server, "TAG_STORE", store)
+
+    def churn(i):
+        for _ in range(5):
+            client.post("/tags", json={**tag_fields(f"tag{i % 3}", f"from {i}"), "key": server.DATABASE_KEY})
+            client.request("DELETE", f"/tags/tag{(i + 1) % 3}", json={"key": server.DATABASE_KEY})
+
+    threads = [threading.Thread(target=churn, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = server.SessionLocal()
+    try:
+        expected = sorted((tag.name, tag.message) for tag in db.query(server.Tag).all())
+    finally:
+        db.close()
+    assert sorted((tag["name"], tag["message"]) for tag in store.all()) == expected
@@ -0,0 +1,50 @@
+from concurrent.futures import Future
+
+from sqlalchemy import event
+
+import server
+from writeQueue import WriteQueue, CREATE, DELETE
+
+SETTINGS = {"max_batch": 64, "max_delay_ms": 5, "result_timeout": 5}
+
+
+def add_tag(name):
+    db = server.SessionLocal()
+    try:
+        db.add(server.Tag(name=name, message="m", owner="owner", owner_id="1"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_conflict_during_flush_fails_only_the_conflicting_create(client):
+    add_tag("existing")
+
+    raced = []
+
+    def session_factory(**kwargs):
+        session = server.SessionLocal(**kwargs)
+
+        # Another writer inserts "racer" after the batch looked up existing names, before the delete's flush
+        @event.listens_for(session, "before_flush")
+        def insert_racer(session, flush_context, instances):
+            if not raced:
+                raced.append(True)
+                add_tag("racer")
+
+        return session
+
+    queue = WriteQueue(session_factory, server.Tag, SETTINGS)
+    create, delete = Future(), Future()
+    queue._write([
+        (CREATE, {"name": "racer", "message": "queued", "owner": "owner", "owner_id": "2"}, create),
+        (DELETE, {"name": "existing"}, delete),
+    ])
+
+    assert create.result(timeout=1) == (False, "Tag already exists")
+    assert delete.result(timeout=1) == (True, None)
+    db = server.SessionLocal()
+    try:
+        assert {tag.name: tag.message for tag in db.query(server.Tag).all()} == {"racer": "m"}
+    finally:
+        db.close()